@@ -1,19 +1,30 @@
 import os         
 import dash        
 import numpy as np 
-import pandas as pd 
+import pandas as pd
 import plotly.express as px 
 from dash import dcc, html
+from fraud_data import load_transactions
+from fraud_histogram import bin_edges, binned_counts
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+df = load_transactions()
 
-df['log_amt'] = np.log(df['amt'])
+log_amt = np.log(df['amt'].to_numpy())
+edges = bin_edges(log_amt, 50)
+counts = binned_counts(log_amt, edges, df['is_fraud'].to_numpy(), 2)
+log_amt_counts = pd.DataFrame({
+    'log_amt': np.tile(edges[:-1] + np.diff(edges) / 2, 2),
+    'is_fraud': np.repeat(['0', '1'], len(edges) - 1),
+    'count': counts.ravel()
+})
 
-fig = px.histogram(df, x='log_amt', color='is_fraud',
-                   title='Log-Scaled Transaction Amount Distribution',
-                   nbins=50, opacity=0.8,
-                   labels={'log_amt': 'Log(Transaction Amount)'},
-                  color_discrete_map={0: 'blue', 1: 'orange'})
+fig = px.bar(log_amt_counts, x='log_amt', y='count', color='is_fraud',
+             title='Log-Scaled Transaction Amount Distribution',
+             opacity=0.8,
+             labels={'log_amt': 'Log(Transaction Amount)'},
+             color_discrete_map={'0': 'blue', '1': 'orange'})
+fig.update_traces(width=edges[1] - edges[0])
+fig.update_layout(bargap=0)
 
 app = dash.Dash(__name__)
 app.layout = html.Div([
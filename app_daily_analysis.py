@@ -5,140 +5,178 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from functools import lru_cache
+from fraud_aggregates import load_aggregates, week_label
+from fraud_cube import load_cube
+from fraud_data import DAY_ORDER
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+cube = load_cube()
+aggregates = load_aggregates()
 
-df['transaction_date'] = pd.to_datetime(df['trans_date_trans_time'])
-df['day_of_week'] = df['transaction_date'].dt.dayofweek
-day_names = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday',
-             4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
-df['day_of_week'] = df['day_of_week'].map(day_names)
+day_order = DAY_ORDER
 
-day_stats = df.groupby('day_of_week').agg({
-    'is_fraud': ['count', 'sum', 'mean']
-}).round(4)
-day_stats.columns = ['total_transactions', 'fraud_count', 'fraud_rate']
-day_stats = day_stats.reset_index()
+@lru_cache(maxsize=1)
+def day_tables_for_version(version):
+    overall_stats = cube.stats().iloc[0]
 
-day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-day_stats = day_stats.set_index('day_of_week').reindex(day_order).reset_index()
+    day_fraud_counts = cube.rollup('day_of_week', 'is_fraud')['count'].reset_index()
+    day_fraud_counts['day_of_week'] = [DAY_ORDER[day] for day in day_fraud_counts['day_of_week']]
+    day_fraud_counts['is_fraud'] = day_fraud_counts['is_fraud'].astype(str)
+
+    day_counts = cube.stats('day_of_week')
+    day_stats = pd.DataFrame({
+        'day_of_week': [DAY_ORDER[day] for day in day_counts.index],
+        'total_transactions': day_counts['transactions'].to_numpy(),
+        'fraud_count': day_counts['frauds'].to_numpy(),
+        'fraud_rate': (day_counts['frauds'] / day_counts['transactions']).round(4).to_numpy()
+    })
+
+    day_stats = day_stats.set_index('day_of_week').reindex(day_order).reset_index()
+    return overall_stats, day_fraud_counts, day_stats
+
+def day_tables():
+    return day_tables_for_version(cube.version)
+
+@lru_cache(maxsize=1)
+def weekly_fraud_for_version(version):
+    # The (week, weekday) sums live in the aggregates and grow with every
+    # appended batch; only the last four weeks are plotted.
+    weekly = aggregates.table(('week', 'day_of_week')).tail(len(day_order) * 4)
+    weeks = weekly.index.get_level_values('week')
+    days = weekly.index.get_level_values('day_of_week')
+    return pd.DataFrame({
+        'week_str': [week_label(week) for week in weeks],
+        'day_of_week': [day_order[day] for day in days],
+        'is_fraud': (weekly['frauds'] / weekly['transactions']).to_numpy()
+    })
+
+def weekly_fraud_series():
+    return weekly_fraud_for_version(aggregates.version)
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
-app.layout = dbc.Container([
-    
-    dbc.Row([
-        dbc.Col([
-            html.H1("🔍 Fraud Analysis by Day of the Week", 
-                   className="text-center mb-4 text-primary"),
-            html.P("Interactive dashboard to analyze fraud patterns by day",
-                  className="text-center text-muted mb-4")
-        ])
-    ]),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(f"{len(df):,}", className="text-primary mb-0"),
-                    html.P("Total Transactions", className="text-muted")
-                ])
-            ], className="text-center")
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(f"{df['is_fraud'].sum():,}", className="text-danger mb-0"),
-                    html.P("Fraudulent Transactions", className="text-muted")
-                ])
-            ], className="text-center")
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(f"{df['is_fraud'].mean()*100:.2f}%", className="text-warning mb-0"),
-                    html.P("Global Fraud Rate", className="text-muted")
-                ])
-            ], className="text-center")
-        ], width=3),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(f"{day_stats['fraud_rate'].max()*100:.2f}%", className="text-info mb-0"),
-                    html.P("Max Rate per Day", className="text-muted")
-                ])
-            ], className="text-center")
-        ], width=3)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("Display Options", className="card-title"),
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Chart type:", className="form-label"),
-                            dcc.Dropdown(
-                                id='chart-type',
-                                options=[
-                                    {'label': '📊 Grouped Histogram', 'value': 'histogram'},
-                                    {'label': '📈 Fraud Rate', 'value': 'rate'},
-                                    {'label': '🔄 Comparison', 'value': 'comparison'}
-                                ],
-                                value='histogram',
-                                clearable=False
-                            )
-                        ], width=6),
-                        dbc.Col([
-                            html.Label("Color palette:", className="form-label"),
-                            dcc.Dropdown(
-                                id='color-scheme',
-                                options=[
-                                    {'label': '🔵 Blue-Orange', 'value': 'blue_orange'},
-                                    {'label': '🔴 Red-Green', 'value': 'red_green'},
-                                    {'label': '🟣 Viridis', 'value': 'viridis'},
-                                    {'label': '🌈 Plotly', 'value': 'plotly'}
-                                ],
-                                value='blue_orange',
-                                clearable=False
-                            )
-                        ], width=6)
+def serve_layout():
+    overall_stats, _, day_stats = day_tables()
+
+    return dbc.Container([
+
+        dbc.Row([
+            dbc.Col([
+                html.H1("🔍 Fraud Analysis by Day of the Week", 
+                       className="text-center mb-4 text-primary"),
+                html.P("Interactive dashboard to analyze fraud patterns by day",
+                      className="text-center text-muted mb-4")
+            ])
+        ]),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(f"{int(overall_stats['transactions']):,}", className="text-primary mb-0"),
+                        html.P("Total Transactions", className="text-muted")
+                    ])
+                ], className="text-center")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(f"{int(overall_stats['frauds']):,}", className="text-danger mb-0"),
+                        html.P("Fraudulent Transactions", className="text-muted")
+                    ])
+                ], className="text-center")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(f"{overall_stats['fraud_rate']:.2f}%", className="text-warning mb-0"),
+                        html.P("Global Fraud Rate", className="text-muted")
+                    ])
+                ], className="text-center")
+            ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(f"{day_stats['fraud_rate'].max()*100:.2f}%", className="text-info mb-0"),
+                        html.P("Max Rate per Day", className="text-muted")
+                    ])
+                ], className="text-center")
+            ], width=3)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("Display Options", className="card-title"),
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Chart type:", className="form-label"),
+                                dcc.Dropdown(
+                                    id='chart-type',
+                                    options=[
+                                        {'label': '📊 Grouped Histogram', 'value': 'histogram'},
+                                        {'label': '📈 Fraud Rate', 'value': 'rate'},
+                                        {'label': '🔄 Comparison', 'value': 'comparison'}
+                                    ],
+                                    value='histogram',
+                                    clearable=False
+                                )
+                            ], width=6),
+                            dbc.Col([
+                                html.Label("Color palette:", className="form-label"),
+                                dcc.Dropdown(
+                                    id='color-scheme',
+                                    options=[
+                                        {'label': '🔵 Blue-Orange', 'value': 'blue_orange'},
+                                        {'label': '🔴 Red-Green', 'value': 'red_green'},
+                                        {'label': '🟣 Viridis', 'value': 'viridis'},
+                                        {'label': '🌈 Plotly', 'value': 'plotly'}
+                                    ],
+                                    value='blue_orange',
+                                    clearable=False
+                                )
+                            ], width=6)
+                        ])
                     ])
                 ])
             ])
-        ])
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    dcc.Graph(id='main-chart', style={'height': '500px'})
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        dcc.Graph(id='main-chart', style={'height': '500px'})
+                    ])
                 ])
-            ])
-        ], width=8),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("📊 Detailed Statistics", className="card-title mb-3"),
-                    html.Div(id='stats-table')
+            ], width=8),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("📊 Detailed Statistics", className="card-title mb-3"),
+                        html.Div(id='stats-table')
+                    ])
                 ])
-            ])
-        ], width=4)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H5("📈 Time Evolution", className="card-title"),
-                    dcc.Graph(id='time-series-chart', style={'height': '400px'})
+            ], width=4)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H5("📈 Time Evolution", className="card-title"),
+                        dcc.Graph(id='time-series-chart', style={'height': '400px'})
+                    ])
                 ])
             ])
         ])
-    ])
-], fluid=True)
+    ], fluid=True)
+
+
+# Built on every page load so batches appended to the cube show up
+# without a restart.
+app.layout = serve_layout
 
 @app.callback(
     [Output('main-chart', 'figure'),
@@ -148,6 +186,7 @@ app.layout = dbc.Container([
      Input('color-scheme', 'value')]
 )
 def update_charts(chart_type, color_scheme):
+    _, day_fraud_counts, day_stats = day_tables()
     color_maps = {
         'blue_orange': {0: '#1f77b4', 1: '#ff7f0e'},
         'red_green': {0: '#2ca02c', 1: '#d62728'},
@@ -157,13 +196,13 @@ def update_charts(chart_type, color_scheme):
     colors = color_maps[color_scheme]
     
     if chart_type == 'histogram':
-        fig_main = px.histogram(
-            df, x='day_of_week', color='is_fraud',
-            category_orders={'day_of_week': day_order},
+        fig_main = px.bar(
+            day_fraud_counts, x='day_of_week', y='count', color='is_fraud',
+            category_orders={'day_of_week': day_order, 'is_fraud': ['0', '1']},
             title='Transaction Distribution by Day of the Week',
             labels={'day_of_week': 'Day of the Week', 'count': 'Number of Transactions'},
             barmode='group',
-            color_discrete_map=colors
+            color_discrete_map={str(key): color for key, color in colors.items()}
         )
         fig_main.update_layout(
             plot_bgcolor='rgba(0,0,0,0)',
@@ -257,13 +296,8 @@ def update_charts(chart_type, color_scheme):
         ], className="mb-2")
         stats_cards.append(card)
     
-    df_weekly = df.copy()
-    df_weekly['week'] = df_weekly['transaction_date'].dt.to_period('W')
-    weekly_fraud = df_weekly.groupby(['week', 'day_of_week'])['is_fraud'].mean().reset_index()
-    weekly_fraud['week_str'] = weekly_fraud['week'].astype(str)
-    
     fig_time = px.line(
-        weekly_fraud.tail(len(day_order)*4),  
+        weekly_fraud_series(),
         x='week_str', y='is_fraud', color='day_of_week',
         title='Fraud Rate Evolution (Last 4 weeks)',
         labels={'week_str': 'Week', 'is_fraud': 'Fraud Rate', 'day_of_week': 'Day of Week'},
@@ -5,24 +5,59 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
-from dash import dcc, html, Input, Output
+from dash import dcc, html, Input, Output, State
+from scipy.special import stdtrit
+from fraud_data import load_transactions
+from fraud_geo import (LOCATION_COLUMNS, RASTER_HEIGHT, RASTER_WIDTH, load_geo_grid, load_geo_raster,
+                       load_spatial_index, pixel_centers, raster_counts)
+from fraud_index import load_amount_index
+from fraud_sample import load_sample_order
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+df = load_transactions()
+amount_index = load_amount_index()
 
-max_samples = 15000
-sample_df = df.sample(max_samples) if len(df) > max_samples else df.copy()
+# Rows in a seeded, fraud- and state-stratified order: a sample of any size
+# is a prefix (of the rows passing the filters), the same in every worker.
+sample_order = load_sample_order()
+# Position of every row in that order, to pick the same sample inside a
+# zoomed viewport.
+sample_rank = np.empty(len(df), dtype='int64')
+sample_rank[sample_order] = np.arange(len(df))
+amounts = df['amt'].to_numpy(dtype='float64')
+frauds = df['is_fraud'].to_numpy() == 1
 
-geo_stats = sample_df.groupby(['state']).agg({
-    'is_fraud': ['count', 'sum', 'mean'],
-    'amt': ['mean', 'sum'],
-    'lat': 'mean',
-    'long': 'mean'
-}).reset_index()
-geo_stats.columns = ['state', 'total_trans', 'fraud_count', 'fraud_rate', 'avg_amount', 'total_amount', 'avg_lat', 'avg_long']
-geo_stats['fraud_rate'] = geo_stats['fraud_rate'] * 100
+FILTER_INFO = {
+    'all': ('total', "📊 All Transactions"),
+    'fraud_only': ('fraudulent', "🚨 Fraudulent Transactions Only"),
+    'legit_only': ('legitimate', "✅ Legitimate Transactions Only"),
+}
+
+def state_stats(sums):
+    count = sums['count']
+    return pd.DataFrame({
+        'state': sums.index.astype(str),
+        'total_trans': count.to_numpy(),
+        'fraud_count': sums['is_fraud'].to_numpy().astype('int64'),
+        'fraud_rate': (sums['is_fraud'] / count * 100).to_numpy(),
+        'avg_amount': (sums['amt'] / count).to_numpy(),
+        'total_amount': sums['amt'].to_numpy(),
+        'avg_lat': (sums['lat'] / count).to_numpy(),
+        'avg_long': (sums['long'] / count).to_numpy(),
+    })
+
+geo_stats = state_stats(amount_index.range_sums())
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP])
 
+# State outlines of the geo maps come from plotly.js's topojson files,
+# fetched from its CDN unless FRAUD_TOPOJSON_URL or assets/topojson/
+# (filled by fetch_topojson.py) provides a copy.
+graph_config = {}
+if os.environ.get('FRAUD_TOPOJSON_URL'):
+    graph_config['topojsonURL'] = os.environ['FRAUD_TOPOJSON_URL']
+elif os.path.exists(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'topojson', 'usa_110m.json')):
+    graph_config['topojsonURL'] = app.get_asset_url('topojson/')
+
 app.layout = dbc.Container([
     dbc.Row([
         dbc.Col([
@@ -50,12 +85,25 @@ app.layout = dbc.Container([
                                 id='map-type-dropdown',
                                 options=[
                                     {'label': 'Scatter Plot - Individual Transactions', 'value': 'scatter'},
+                                    {'label': 'WebGL Scatter - Individual Transactions', 'value': 'scattergl'},
+                                    {'label': 'Raster Map - All Transactions', 'value': 'raster'},
                                     {'label': 'State-Level Heatmap', 'value': 'choropleth'},
                                     {'label': 'Density Map - Fraud Hotspots', 'value': 'density'},
                                     {'label': 'Bubble Map - Transaction Volume', 'value': 'bubble'}
                                 ],
                                 value='scatter',
                                 clearable=False
+                            ),
+                            dcc.RadioItems(
+                                id='location-radio',
+                                options=[
+                                    {'label': ' Cardholder', 'value': 'cardholder'},
+                                    {'label': ' Merchant', 'value': 'merchant'}
+                                ],
+                                value='cardholder',
+                                inline=True,
+                                inputClassName="ms-2",
+                                className="mt-2"
                             )
                         ], width=3),
                         dbc.Col([
@@ -163,7 +211,7 @@ app.layout = dbc.Container([
                 ]),
                 dbc.CardBody([
                     dcc.Loading(
-                        dcc.Graph(id='geo-fraud-map', style={'height': '600px'}),
+                        dcc.Graph(id='geo-fraud-map', style={'height': '600px'}, config=graph_config),
                         type="circle", color="#2E86AB"
                     )
                 ])
@@ -260,47 +308,19 @@ app.layout = dbc.Container([
     [Input('map-type-dropdown', 'value'),
      Input('sample-size-slider', 'value'),
      Input('fraud-filter-dropdown', 'value'),
-     Input('amount-range-slider', 'value')]
+     Input('amount-range-slider', 'value'),
+     Input('location-radio', 'value')]
 )
-def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range):
-    filtered_df = sample_df.copy()
-    
-    filtered_df = filtered_df[
-        (filtered_df['amt'] >= amount_range[0]) & 
-        (filtered_df['amt'] <= amount_range[1])
-    ]
-    
-    original_filtered_df = filtered_df.copy()
+def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range, location='cardholder'):
+    # The first ``sample_size`` matching rows of the sample order, the same
+    # candidates a zoom or double-click draws from in update_map_viewport.
+    display_df = df.iloc[sample_prefix(amount_range, fraud_filter, sample_size)]
     
-    display_df = filtered_df.copy()
-    if fraud_filter == 'fraud_only':
-        display_df = display_df[display_df['is_fraud'] == 1]
-    elif fraud_filter == 'legit_only':
-        display_df = display_df[display_df['is_fraud'] == 0]
-    
-    if len(display_df) > sample_size:
-        display_df = display_df.sample(sample_size)
-    
-    geo_stats_filtered = original_filtered_df.groupby(['state']).agg({
-        'is_fraud': ['count', 'sum', 'mean'],
-        'amt': ['mean', 'sum'],
-        'lat': 'mean',
-        'long': 'mean'
-    }).reset_index()
-    geo_stats_filtered.columns = ['state', 'total_trans', 'fraud_count', 'fraud_rate', 
-                                 'avg_amount', 'total_amount', 'avg_lat', 'avg_long']
-    geo_stats_filtered['fraud_rate'] = geo_stats_filtered['fraud_rate'] * 100
+    geo_stats_filtered = state_stats(amount_index.range_sums(amount_range[0], amount_range[1]))
     geo_stats_filtered = geo_stats_filtered.sort_values('fraud_rate', ascending=False)
     
-    if fraud_filter == 'fraud_only':
-        display_stats_text = f"Showing {len(display_df):,} fraudulent transactions"
-        filter_info = "🚨 Fraudulent Transactions Only"
-    elif fraud_filter == 'legit_only':
-        display_stats_text = f"Showing {len(display_df):,} legitimate transactions"
-        filter_info = "✅ Legitimate Transactions Only"
-    else:
-        display_stats_text = f"Showing {len(display_df):,} total transactions"
-        filter_info = "📊 All Transactions"
+    kind, filter_info = FILTER_INFO.get(fraud_filter, FILTER_INFO['all'])
+    display_stats_text = f"Showing {len(display_df):,} {kind} transactions"
     
     states_count = len(geo_stats_filtered)
     highest_risk = geo_stats_filtered.iloc[0]['state'] if len(geo_stats_filtered) > 0 else "N/A"
@@ -309,15 +329,11 @@ def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range
     fraud_counts = geo_stats_filtered['fraud_count'].values
     geo_concentration = f"{np.std(fraud_counts)/np.mean(fraud_counts):.2f}" if len(fraud_counts) > 0 and np.mean(fraud_counts) > 0 else "N/A"
     
-    if map_type == 'scatter':
-        map_fig = px.scatter(
-            display_df, x='long', y='lat', color='is_fraud',
-            title=f'Individual Transaction Locations - {filter_info}',
-            opacity=0.6, size='amt',
-            color_discrete_map={0: '#2E86AB', 1: '#F24236'},
-            hover_data=['state', 'amt']
-        )
-        map_title = f"Scatter Plot - {display_stats_text}"
+    if map_type in ('scatter', 'scattergl'):
+        map_fig, map_title = point_map(map_type, display_df, filter_info, display_stats_text, location)
+        
+    elif map_type == 'raster':
+        map_fig, map_title = raster_map(amount_range, fraud_filter, filter_info, location)
         
     elif map_type == 'bubble':
         map_fig = px.scatter(
@@ -331,23 +347,13 @@ def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range
         
     elif map_type == 'density':
         if fraud_filter == 'legit_only':
-            density_data = display_df
             density_title = 'Legitimate Transaction Density'
         elif fraud_filter == 'fraud_only':
-            density_data = display_df
             density_title = 'Fraudulent Transaction Density'
         else:
-            density_data = display_df
             density_title = 'Transaction Density (All)'
             
-        map_fig = px.density_mapbox(
-            density_data, 
-            lat='lat', lon='long', z='amt',
-            radius=10, center=dict(lat=39.5, lon=-98.35), zoom=3,
-            mapbox_style="open-street-map",
-            title=f'{density_title} - {filter_info}'
-        )
-        map_title = f"Density Map - {display_stats_text}"
+        map_fig, map_title = density_map(amount_range, fraud_filter, f'{density_title} - {filter_info}', location)
         
     else:  
         map_fig = px.choropleth(
@@ -387,9 +393,9 @@ def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range
     scatter_chart = px.scatter(
         geo_stats_filtered, x='total_trans', y='fraud_rate',
         size='fraud_count', hover_data=['state'],
-        title=f'Fraud Rate vs Transaction Volume - {filter_info}',
-        trendline="ols"
+        title=f'Fraud Rate vs Transaction Volume - {filter_info}'
     )
+    add_trendline(scatter_chart, geo_stats_filtered['total_trans'], geo_stats_filtered['fraud_rate'])
     scatter_chart.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
     
     action_plan = generate_action_plan(geo_stats_filtered, filter_info)
@@ -398,6 +404,234 @@ def update_geographic_analysis(map_type, sample_size, fraud_filter, amount_range
             map_fig, map_title, rankings_component, insights,
             state_chart, scatter_chart, action_plan)
 
+def ols_trendline(x, y, level=0.95):
+    """Closed-form least-squares line of y on x at the sorted x values, with
+    R² and the ``level`` confidence band of the fitted mean."""
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    x_mean, y_mean = x.mean(), y.mean()
+    sxx = ((x - x_mean) ** 2).sum()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / sxx
+    intercept = y_mean - slope * x_mean
+    sse = ((y - intercept - slope * x) ** 2).sum()
+    sst = ((y - y_mean) ** 2).sum()
+    x_line = np.sort(x)
+    y_line = intercept + slope * x_line
+    margin = (stdtrit(n - 2, 0.5 + level / 2) * np.sqrt(sse / (n - 2))
+              * np.sqrt(1 / n + (x_line - x_mean) ** 2 / sxx))
+    return {
+        'slope': slope, 'intercept': intercept, 'r2': 1 - sse / sst if sst > 0 else np.nan,
+        'x': x_line, 'y': y_line, 'lower': y_line - margin, 'upper': y_line + margin,
+    }
+
+def add_trendline(fig, x, y, level=0.95):
+    if len(x) < 3 or np.ptp(x) == 0:
+        return
+    fit = ols_trendline(x, y, level)
+    fig.add_trace(go.Scatter(
+        x=fit['x'], y=fit['upper'], mode='lines', line=dict(width=0),
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=fit['x'], y=fit['lower'], mode='lines', line=dict(width=0),
+        fill='tonexty', fillcolor='rgba(99, 110, 250, 0.15)',
+        showlegend=False, hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=fit['x'], y=fit['y'], mode='lines', showlegend=False,
+        hovertemplate='<b>OLS trendline</b><br>%s = %g * %s + %g<br>R<sup>2</sup>=%f<br>'
+                      '%d%% confidence band<br><br>%s=%%{x}<br>%s=%%{y} <b>(trend)</b><extra></extra>'
+                      % (y.name, fit['slope'], x.name, fit['intercept'], fit['r2'], level * 100, x.name, y.name)
+    ))
+
+def viewport(relayout):
+    """(lon_min, lon_max, lat_min, lat_max) shown after a zoom, pan or
+    autorange in ``relayoutData``, unbounded on axes it does not set; None
+    for any other relayout."""
+    relayout = relayout or {}
+    bounds = [-np.inf, np.inf, -np.inf, np.inf]
+    changed = False
+    for offset, axis in ((0, 'xaxis'), (2, 'yaxis')):
+        if f'{axis}.range[0]' in relayout and f'{axis}.range[1]' in relayout:
+            axis_range = [relayout[f'{axis}.range[0]'], relayout[f'{axis}.range[1]']]
+        else:
+            axis_range = relayout.get(f'{axis}.range')
+        if axis_range is not None:
+            bounds[offset:offset + 2] = sorted(float(value) for value in axis_range)
+        changed |= axis_range is not None or bool(relayout.get(f'{axis}.autorange'))
+    return tuple(bounds) if changed else None
+
+def filter_rows(rows, amount_range, fraud_filter):
+    keep = (amounts[rows] >= amount_range[0]) & (amounts[rows] <= amount_range[1])
+    if fraud_filter == 'fraud_only':
+        keep &= frauds[rows]
+    elif fraud_filter == 'legit_only':
+        keep &= ~frauds[rows]
+    return rows[keep]
+
+def viewport_rows(bounds, amount_range, fraud_filter, location):
+    return filter_rows(load_spatial_index(location=location).query(*bounds), amount_range, fraud_filter)
+
+def sample_prefix(amount_range, fraud_filter, sample_size):
+    """The first ``sample_size`` rows of the sample order passing the
+    filters. The order is walked in doubling prefix chunks, so the cost
+    follows the prefix needed rather than the dataset (one slice of
+    ``sample_size`` rows without filters)."""
+    found = []
+    count = 0
+    start, step = 0, sample_size
+    while count < sample_size and start < len(sample_order):
+        rows = filter_rows(sample_order[start:start + step], amount_range, fraud_filter)
+        found.append(rows)
+        count += len(rows)
+        start, step = start + step, step * 2
+    return np.concatenate(found)[:sample_size] if found else np.zeros(0, dtype=sample_order.dtype)
+
+def ordered_sample(rows, amount_range, fraud_filter, sample_size):
+    """The ``sample_size`` rows of ``rows`` passing the filters that come
+    first in the sample order, in that order."""
+    rows = filter_rows(rows, amount_range, fraud_filter)
+    if len(rows) > sample_size:
+        rows = rows[np.argpartition(sample_rank[rows], sample_size - 1)[:sample_size]]
+    return rows[np.argsort(sample_rank[rows])]
+
+def point_map(map_type, display_df, filter_info, display_stats_text, location='cardholder'):
+    lat, long = LOCATION_COLUMNS[location]
+    if map_type == 'scattergl':
+        return webgl_scatter_map(display_df, filter_info, lat, long), f"WebGL Scatter - {display_stats_text}"
+    map_fig = px.scatter(
+        display_df, x=long, y=lat, color='is_fraud',
+        title=f'Individual Transaction Locations - {filter_info}',
+        opacity=0.6, size='amt',
+        color_discrete_map={0: '#2E86AB', 1: '#F24236'},
+        hover_data=['state', 'amt']
+    )
+    return map_fig, f"Scatter Plot - {display_stats_text}"
+
+@app.callback(
+    [Output('geo-fraud-map', 'figure', allow_duplicate=True),
+     Output('map-title', 'children', allow_duplicate=True)],
+    Input('geo-fraud-map', 'relayoutData'),
+    [State('map-type-dropdown', 'value'),
+     State('sample-size-slider', 'value'),
+     State('fraud-filter-dropdown', 'value'),
+     State('amount-range-slider', 'value'),
+     State('location-radio', 'value')],
+    prevent_initial_call=True
+)
+def update_map_viewport(relayout, map_type, sample_size, fraud_filter, amount_range, location):
+    # Zooming or panning the point and raster maps re-queries the spatial
+    # index for the visible box only: the scatter shows the first
+    # ``sample_size`` rows of the sample order inside it and the raster is
+    # re-binned over it, so detail grows as the box shrinks.
+    bounds = viewport(relayout)
+    if bounds is None or map_type not in ('scatter', 'scattergl', 'raster'):
+        return dash.no_update, dash.no_update
+    kind, filter_info = FILTER_INFO.get(fraud_filter, FILTER_INFO['all'])
+    if map_type == 'raster':
+        rows = viewport_rows(bounds, amount_range, fraud_filter, location)
+        lat, long = LOCATION_COLUMNS[location]
+        box = tuple(np.where(np.isfinite(bounds), bounds, load_spatial_index(location=location).bounds))
+        count, fraud_count = raster_counts(df[lat].to_numpy()[rows], df[long].to_numpy()[rows], frauds[rows], box)
+        map_fig, map_title = raster_figure(count, fraud_count, *pixel_centers(box, RASTER_WIDTH, RASTER_HEIGHT),
+                                           fraud_filter, filter_info)
+    else:
+        rows = ordered_sample(load_spatial_index(location=location).query(*bounds), amount_range, fraud_filter,
+                              sample_size)
+        map_fig, map_title = point_map(map_type, df.iloc[rows], filter_info,
+                                       f"Showing {len(rows):,} {kind} transactions in view", location)
+    map_fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+    if np.isfinite(bounds[0]):
+        map_fig.update_xaxes(range=bounds[:2])
+    if np.isfinite(bounds[2]):
+        map_fig.update_yaxes(range=bounds[2:])
+    return map_fig, map_title
+
+def webgl_scatter_map(display_df, filter_info, lat='lat', long='long'):
+    # Same encoding as the px scatter, as float32 typed arrays and without
+    # per-point hover strings.
+    max_amt = display_df['amt'].max() if len(display_df) > 0 else 1
+    map_fig = go.Figure()
+    for label, color in ((0, '#2E86AB'), (1, '#F24236')):
+        points = display_df[display_df['is_fraud'] == label]
+        if len(points) == 0:
+            continue
+        amt = points['amt'].to_numpy(dtype='float32')
+        map_fig.add_trace(go.Scattergl(
+            x=points[long].to_numpy(dtype='float32'), y=points[lat].to_numpy(dtype='float32'),
+            mode='markers', name=str(label), opacity=0.6,
+            marker=dict(color=color, size=amt, sizemode='area', sizeref=2 * max_amt / 20 ** 2, sizemin=1),
+            hovertemplate='long=%{x}<br>lat=%{y}<br>amt=%{marker.size:$,.2f}<extra></extra>'
+        ))
+    map_fig.update_layout(
+        title=f'Individual Transaction Locations - {filter_info}',
+        xaxis_title=long, yaxis_title=lat, legend_title_text='is_fraud'
+    )
+    return map_fig
+
+def raster_map(amount_range, fraud_filter, filter_info, location='cardholder'):
+    geo_raster = load_geo_raster(location=location)
+    count, frauds = geo_raster.query(amount_range[0], amount_range[1])
+    return raster_figure(count, frauds, geo_raster.x, geo_raster.y, fraud_filter, filter_info)
+
+def raster_figure(count, frauds, x, y, fraud_filter, filter_info):
+    if fraud_filter == 'fraud_only':
+        count = frauds
+    elif fraud_filter == 'legit_only':
+        count = count - frauds
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if fraud_filter == 'all':
+            z = np.where(count > 0, frauds / count * 100, np.nan)
+            colorbar_title = 'Fraud Rate (%)'
+        else:
+            z = np.where(count > 0, count, np.nan)
+            colorbar_title = 'Transactions'
+    
+    map_fig = go.Figure(go.Heatmap(
+        x=x, y=y, z=z.astype('float32'), customdata=count.astype('int32'),
+        colorscale='Reds', colorbar=dict(title=colorbar_title),
+        hovertemplate='long %{x:.1f}, lat %{y:.1f}<br>%{customdata:,} transactions<br>'
+                      + colorbar_title + ': %{z:.1f}<extra></extra>'
+    ))
+    map_fig.update_layout(
+        title=f'Transactions per Pixel - {filter_info}',
+        xaxis_title='long', yaxis_title='lat'
+    )
+    map_title = f"Raster Map - {int(count.sum()):,} transactions in {int((count > 0).sum()):,} pixels"
+    return map_fig, map_title
+
+def density_map(amount_range, fraud_filter, title, location='cardholder'):
+    # Polygons of the hex/square grid cells as a GeoJSON choropleth on the
+    # albers-usa state outlines: color is the amount per cell (as the old
+    # amount-weighted density), or the count when a fraud filter is set.
+    geo_grid = load_geo_grid(location=location)
+    cells = geo_grid.query(amount_range[0], amount_range[1])
+    if fraud_filter == 'fraud_only':
+        cells = cells.assign(count=cells['frauds'])
+    elif fraud_filter == 'legit_only':
+        cells = cells.assign(count=cells['count'] - cells['frauds'], frauds=0)
+    cells = cells[cells['count'] > 0]
+    fraud_rate = cells['frauds'] / cells['count'] * 100
+    color = cells['amt_sum'] if fraud_filter == 'all' else cells['count']
+    
+    map_fig = go.Figure(go.Choropleth(
+        geojson=geo_grid.geojson(cells['cell']), locations=cells['cell'].astype(str), z=color,
+        colorscale='Reds', marker=dict(opacity=0.8, line=dict(width=0)),
+        colorbar=dict(title='Amount ($)' if fraud_filter == 'all' else 'Transactions'),
+        customdata=np.column_stack([cells['count'], cells['frauds'], fraud_rate, cells['long'], cells['lat']]),
+        hovertemplate='%{customdata[0]:,} transactions, %{customdata[1]:,} frauds (%{customdata[2]:.1f}%)'
+                      '<br>long %{customdata[3]:.2f}, lat %{customdata[4]:.2f}<extra></extra>'
+    ))
+    map_fig.update_layout(
+        title=title,
+        geo=dict(scope='usa', projection_type='albers usa', showland=True, landcolor='#f2f2f2',
+                 showsubunits=True, subunitcolor='#999999')
+    )
+    map_title = f"Density Map - {len(cells):,} cells from {int(cells['count'].sum()):,} transactions"
+    return map_fig, map_title
+
 def generate_geographic_insights(geo_stats, filter_info, display_stats):
     insights = []
     
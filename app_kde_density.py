@@ -1,14 +1,19 @@
 import os
 import dash
 import numpy as np
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy import stats
-from dash import dcc, html, Input, Output
+from functools import lru_cache
+from dash import dcc, html, Input, Output, State, Patch
+from fraud_data import load_transactions
+from fraud_histogram import bin_edges, binned_counts, histogram_traces
+from fraud_index import load_threshold_index
+from fraud_kde import binned_kde, trapezoid
 
-# Load your actual data
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+df = load_transactions()
+threshold_index = load_threshold_index()
+total_fraud = len(threshold_index.fraud)
+total_non_fraud = len(threshold_index.non_fraud)
 
 app = dash.Dash(__name__)
 
@@ -52,7 +57,8 @@ app.layout = html.Div([
                 options=[
                     {'label': 'KDE Density', 'value': 'kde'},
                     {'label': 'Histogram', 'value': 'hist'},
-                    {'label': 'Box Plot', 'value': 'box'}
+                    {'label': 'Box Plot', 'value': 'box'},
+                    {'label': 'Precision-Recall Curve', 'value': 'pr'}
                 ],
                 value='kde',
                 style={'marginTop': 5}
@@ -91,92 +97,136 @@ app.layout = html.Div([
     html.Div(id='statistics-panel', style={'marginTop': 20})
 ])
 
-@app.callback(
-    [Output('fraud-plot', 'figure'),
-     Output('statistics-panel', 'children')],
-    [Input('threshold-slider', 'value'),
-     Input('xlim-slider', 'value'),
-     Input('plot-type', 'value'),
-     Input('display-options', 'value'),
-     Input('y-scale', 'value')]
-)
-def update_plot(threshold, xlim, plot_type, display_options, y_scale):
-    
-    df_filtered = df[df['amt'] <= xlim].copy()
-    
-    fig = go.Figure()
-    
+@lru_cache(maxsize=64)
+def plot_traces(xlim, plot_type):
+    """Traces for one x-axis limit and chart type; the density fits are
+    only redone when one of them changes."""
+    df_filtered = df[df['amt'] <= xlim]
+    traces = []
+
     if plot_type == 'kde':
-        
+
         fraud_data = df_filtered[df_filtered['is_fraud'] == 1]['amt']
         non_fraud_data = df_filtered[df_filtered['is_fraud'] == 0]['amt']
-        
-        x_range = np.linspace(0, xlim, 1000)  
-        
+
+        x_range = np.linspace(0, xlim, 1000)
+
         if len(fraud_data) > 0:
-            kde_fraud = stats.gaussian_kde(fraud_data)
-            fraud_density = kde_fraud(x_range)
-            fraud_density = fraud_density / np.trapz(fraud_density, x_range)
-            
-            fig.add_trace(go.Scatter(
+            fraud_density = binned_kde(fraud_data, x_range)
+            fraud_density = fraud_density / trapezoid(fraud_density, x_range)
+
+            traces.append(go.Scatter(
                 x=x_range, y=fraud_density,
                 mode='lines', name='Fraud',
                 line=dict(color='orange', width=2),
-                fill='tonexty' if len(fig.data) == 0 else None
+                fill='tonexty' if len(traces) == 0 else None
             ))
-        
+
         if len(non_fraud_data) > 0:
-            kde_non_fraud = stats.gaussian_kde(non_fraud_data)
-            non_fraud_density = kde_non_fraud(x_range)
-            non_fraud_density = non_fraud_density / np.trapz(non_fraud_density, x_range)
-            
-            fig.add_trace(go.Scatter(
+            non_fraud_density = binned_kde(non_fraud_data, x_range)
+            non_fraud_density = non_fraud_density / trapezoid(non_fraud_density, x_range)
+
+            traces.append(go.Scatter(
                 x=x_range, y=non_fraud_density,
                 mode='lines', name='Non-Fraud',
                 line=dict(color='blue', width=2),
-                fill='tonexty' if len(fig.data) == 0 else None
+                fill='tonexty' if len(traces) == 0 else None
             ))
-    
+
     elif plot_type == 'hist':
-        
-        fig.add_trace(go.Histogram(
-            x=df_filtered[df_filtered['is_fraud'] == 1]['amt'],
-            name='Fraud', opacity=0.7, nbinsx=50,
-            marker_color='orange', histnorm='probability density'
-        ))
-        
-        fig.add_trace(go.Histogram(
-            x=df_filtered[df_filtered['is_fraud'] == 0]['amt'],
-            name='Non-Fraud', opacity=0.7, nbinsx=50,
-            marker_color='blue', histnorm='probability density'
+
+        amounts = df_filtered['amt'].to_numpy()
+        edges = bin_edges(amounts, 50)
+        counts = binned_counts(amounts, edges, df_filtered['is_fraud'].to_numpy(), 2)
+
+        traces.extend(histogram_traces(
+            counts[::-1], edges, ['Fraud', 'Non-Fraud'], ['orange', 'blue'],
+            histnorm='probability density', opacity=0.7
         ))
-    
+
     elif plot_type == 'box':
-        
-        fig.add_trace(go.Box(
-            y=df_filtered[df_filtered['is_fraud'] == 1]['amt'],
-            name='Fraud', marker_color='orange',
-            x=['Fraud'] * len(df_filtered[df_filtered['is_fraud'] == 1])
+
+        box_stats = threshold_index.box_stats(xlim)
+
+        for key, name, color in (('fraud', 'Fraud', 'orange'), ('non_fraud', 'Non-Fraud', 'blue')):
+            if key not in box_stats:
+                continue
+            box = box_stats[key]
+            traces.append(go.Box(
+                name=name, marker_color=color, x=[name],
+                q1=[box['q1']], median=[box['median']], q3=[box['q3']],
+                lowerfence=[box['lowerfence']], upperfence=[box['upperfence']],
+                y=[box['outliers'].tolist()], boxpoints='outliers'
+            ))
+
+    elif plot_type == 'pr':
+
+        curve = threshold_index.curve(threshold_index.thresholds(xlim), xlim)
+
+        traces.append(go.Scatter(
+            x=curve['threshold'].to_numpy(), y=curve['precision'].to_numpy(),
+            mode='lines', name='Precision (%)',
+            line=dict(color='orange', width=2)
         ))
-        
-        fig.add_trace(go.Box(
-            y=df_filtered[df_filtered['is_fraud'] == 0]['amt'],
-            name='Non-Fraud', marker_color='blue',
-            x=['Non-Fraud'] * len(df_filtered[df_filtered['is_fraud'] == 0])
+
+        traces.append(go.Scatter(
+            x=curve['threshold'].to_numpy(), y=curve['recall'].to_numpy(),
+            mode='lines', name='Recall (%)',
+            line=dict(color='blue', width=2)
         ))
-    
+
+        traces.append(go.Scatter(
+            x=curve['threshold'].to_numpy(), y=curve['alerts'].to_numpy(),
+            mode='lines', name='Alerts',
+            line=dict(color='gray', width=1, dash='dot'),
+            yaxis='y2'
+        ))
+
+    return tuple(traces)
+
+
+def threshold_layout(threshold, xlim, plot_type, display_options, y_scale):
+    """The layout parts that follow the threshold, display options and y
+    scale: title, y-axis type/range and the threshold line, spelled out as
+    the shape and annotation ``fig.add_vline`` would add."""
+    layout = {
+        'title': {'text': f'Amount Distribution: Fraud vs Non-Fraud (Threshold: ${threshold:,})'},
+        'yaxis': {'type': y_scale},
+        'shapes': [],
+        'annotations': [],
+    }
+
     if 'threshold' in display_options and plot_type != 'box':
-        fig.add_vline(
-            x=threshold, line_dash="dash", line_color="black",
-            annotation_text=f"Threshold: ${threshold}",
-            annotation_position="top"
-        )
-    
+        layout['shapes'].append(dict(
+            type='line', x0=threshold, x1=threshold, xref='x', y0=0, y1=1, yref='y domain',
+            line=dict(color='black', dash='dash')
+        ))
+        layout['annotations'].append(dict(
+            text=f"Threshold: ${threshold}", showarrow=False,
+            x=threshold, xref='x', xanchor='center', y=1, yref='y domain', yanchor='bottom'
+        ))
+
+    if plot_type == 'box':
+        layout['yaxis']['range'] = [0, xlim] if y_scale == 'linear' else [1, xlim]
+
+    return layout
+
+
+@app.callback(
+    Output('fraud-plot', 'figure'),
+    [Input('xlim-slider', 'value'),
+     Input('plot-type', 'value')],
+    [State('threshold-slider', 'value'),
+     State('display-options', 'value'),
+     State('y-scale', 'value')]
+)
+def update_plot(xlim, plot_type, threshold, display_options, y_scale):
+
+    fig = go.Figure(data=plot_traces(xlim, plot_type))
+
     fig.update_layout(
-        title=f'Amount Distribution: Fraud vs Non-Fraud (Threshold: ${threshold:,})',
         xaxis_title='Amount ($)' if plot_type != 'box' else 'Transaction Type',
         yaxis_title='Density' if plot_type != 'box' else 'Amount ($)',
-        yaxis_type=y_scale,
         template='plotly_white',
         hovermode='x unified' if plot_type != 'box' else 'closest',
         legend=dict(x=0.7, y=0.95)
@@ -187,57 +237,99 @@ def update_plot(threshold, xlim, plot_type, display_options, y_scale):
     else:
         fig.update_layout(
             xaxis=dict(type='category'),
-            yaxis=dict(range=[0, xlim] if y_scale == 'linear' else [1, xlim]),
             margin=dict(l=60, r=60, t=80, b=60)
         )
-    
+
     if plot_type == 'hist':
         fig.update_layout(barmode='overlay')
-    
+
+    if plot_type == 'pr':
+        fig.update_layout(
+            xaxis_title='Alert Threshold ($)',
+            yaxis_title='Percent',
+            yaxis2=dict(title='Alerts (amount > threshold)', overlaying='y', side='right', showgrid=False)
+        )
+
+    fig.update_layout(threshold_layout(threshold, xlim, plot_type, display_options, y_scale))
+    return fig
+
+
+@app.callback(
+    Output('fraud-plot', 'figure', allow_duplicate=True),
+    [Input('threshold-slider', 'value'),
+     Input('display-options', 'value'),
+     Input('y-scale', 'value')],
+    [State('xlim-slider', 'value'),
+     State('plot-type', 'value')],
+    prevent_initial_call=True
+)
+def update_threshold(threshold, display_options, y_scale, xlim, plot_type):
+    """Move the threshold line and rescale the y axis without resending the
+    traces."""
+    patch = Patch()
+    for key, value in threshold_layout(threshold, xlim, plot_type, display_options, y_scale).items():
+        if key in ('xaxis', 'yaxis'):
+            for axis_key, axis_value in value.items():
+                patch['layout'][key][axis_key] = axis_value
+        else:
+            patch['layout'][key] = value
+    return patch
+
+
+@app.callback(
+    Output('statistics-panel', 'children'),
+    [Input('threshold-slider', 'value'),
+     Input('xlim-slider', 'value'),
+     Input('display-options', 'value')]
+)
+def update_statistics(threshold, xlim, display_options):
+
     stats_content = []
     if 'stats' in display_options:
-        fraud_stats = df_filtered[df_filtered['is_fraud'] == 1]['amt']
-        non_fraud_stats = df_filtered[df_filtered['is_fraud'] == 0]['amt']
-        
-        fraud_above_threshold = len(fraud_stats[fraud_stats > threshold])
-        non_fraud_above_threshold = len(non_fraud_stats[non_fraud_stats > threshold])
-        total_above_threshold = fraud_above_threshold + non_fraud_above_threshold
-        
-        fraud_rate_above_threshold = (fraud_above_threshold / total_above_threshold * 100) if total_above_threshold > 0 else 0
-        
-        fraud_count = len(fraud_stats)
-        non_fraud_count = len(non_fraud_stats)
-        
+        amount_stats = threshold_index.amount_stats(xlim)
+        fraud_stats = amount_stats['fraud']
+        non_fraud_stats = amount_stats['non_fraud']
+        threshold_stats = threshold_index.threshold_stats(threshold, xlim)
+
+        fraud_above_threshold = threshold_stats['fraud_above']
+        non_fraud_above_threshold = threshold_stats['non_fraud_above']
+        total_above_threshold = threshold_stats['alerts']
+
+        fraud_rate_above_threshold = threshold_stats['precision'] if total_above_threshold > 0 else 0
+
+        fraud_count = fraud_stats['count']
+        non_fraud_count = non_fraud_stats['count']
+
         stats_content = [
             html.H3("Statistics", style={'color': '#2c3e50'}),
             html.Div([
                 html.Div([
                     html.H4(f"Fraudulent Transactions (is_fraud=1)", style={'color': 'orange'}),
-                    html.P(f"Total count: {fraud_count:,} / {len(df[df['is_fraud'] == 1]):,} total"),
-                    html.P(f"Average amount: ${fraud_stats.mean():.2f}" if len(fraud_stats) > 0 else "Average amount: N/A"),
-                    html.P(f"Median amount: ${fraud_stats.median():.2f}" if len(fraud_stats) > 0 else "Median amount: N/A"),
+                    html.P(f"Total count: {fraud_count:,} / {total_fraud:,} total"),
+                    html.P(f"Average amount: ${fraud_stats['mean']:.2f}" if fraud_count > 0 else "Average amount: N/A"),
+                    html.P(f"Median amount: ${fraud_stats['median']:.2f}" if fraud_count > 0 else "Median amount: N/A"),
                     html.P(f"Above threshold: {fraud_above_threshold:,}")
                 ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '5%'}),
-                
+
                 html.Div([
                     html.H4(f"Legitimate Transactions (is_fraud=0)", style={'color': 'blue'}),
-                    html.P(f"Total count: {non_fraud_count:,} / {len(df[df['is_fraud'] == 0]):,} total"),
-                    html.P(f"Average amount: ${non_fraud_stats.mean():.2f}" if len(non_fraud_stats) > 0 else "Average amount: N/A"),
-                    html.P(f"Median amount: ${non_fraud_stats.median():.2f}" if len(non_fraud_stats) > 0 else "Median amount: N/A"),
+                    html.P(f"Total count: {non_fraud_count:,} / {total_non_fraud:,} total"),
+                    html.P(f"Average amount: ${non_fraud_stats['mean']:.2f}" if non_fraud_count > 0 else "Average amount: N/A"),
+                    html.P(f"Median amount: ${non_fraud_stats['median']:.2f}" if non_fraud_count > 0 else "Median amount: N/A"),
                     html.P(f"Above threshold: {non_fraud_above_threshold:,}")
                 ], style={'width': '30%', 'display': 'inline-block', 'marginRight': '5%'}),
-                
+
                 html.Div([
                     html.H4("Threshold Analysis", style={'color': 'black'}),
                     html.P(f"Total above: {total_above_threshold:,}"),
                     html.P(f"Fraud rate: {fraud_rate_above_threshold:.1f}%"),
-                    html.P(f"Precision: {(fraud_above_threshold/(fraud_above_threshold + non_fraud_above_threshold)*100):.1f}%" if total_above_threshold > 0 else "Precision: N/A"),
-                    html.P(f"Recall: {(fraud_above_threshold/len(fraud_stats)*100):.1f}%")
+                    html.P(f"Precision: {threshold_stats['precision']:.1f}%" if total_above_threshold > 0 else "Precision: N/A"),
+                    html.P(f"Recall: {threshold_stats['recall']:.1f}%")
                 ], style={'width': '30%', 'display': 'inline-block'})
             ])
         ]
-    
-    return fig, stats_content
+
+    return stats_content
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8050)), debug=False)
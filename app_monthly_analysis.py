@@ -1,34 +1,42 @@
 import os
 import dash
-import pandas as pd
 from dash import dcc, html
+import pandas as pd
 import plotly.express as px
-
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
-
-df['transaction_date'] = pd.to_datetime(df['trans_date_trans_time'])
-df['month'] = df['transaction_date'].dt.month
-
-month_names = {
-    1: 'January', 2: 'February', 3: 'March', 4: 'April',
-    5: 'May', 6: 'June', 7: 'July', 8: 'August',
-    9: 'September', 10: 'October', 11: 'November', 12: 'December'
-}
-df['month'] = df['month'].map(month_names)
-
-fig_month = px.histogram(df, x='month', color='is_fraud',
-                         category_orders={'month': list(month_names.values())},
-                         title='Fraud Occurrence by Month of the Year',
-                         labels={'month': 'Month', 'count': 'Number of Transactions'},
-                         height=600,
-                         barmode='group', opacity=0.8, color_discrete_map={0: 'blue', 1: 'orange'})
+from fraud_aggregates import load_aggregates
+from fraud_data import MONTH_ORDER
+
+aggregates = load_aggregates()
+
+def build_figure():
+    month_day = aggregates.matrix('month', 'day_of_week')
+    month_totals = month_day['count'].sum(axis=1)
+    month_frauds = month_day['frauds'].sum(axis=1)
+    month_counts = pd.concat([
+        pd.DataFrame({'month': month_totals.index, 'is_fraud': '0', 'count': (month_totals - month_frauds).to_numpy()}),
+        pd.DataFrame({'month': month_totals.index, 'is_fraud': '1', 'count': month_frauds.to_numpy()})
+    ])
+    month_counts = month_counts[month_totals.reindex(month_counts['month']).to_numpy() > 0]
+
+    fig_month = px.bar(month_counts, x='month', y='count', color='is_fraud',
+                       category_orders={'month': MONTH_ORDER, 'is_fraud': ['0', '1']},
+                       title='Fraud Occurrence by Month of the Year',
+                       labels={'month': 'Month', 'count': 'Number of Transactions'},
+                       height=600,
+                       barmode='group', opacity=0.8, color_discrete_map={'0': 'blue', '1': 'orange'})
+    return fig_month
 
 app = dash.Dash(__name__)
 
-app.layout = html.Div([
-    html.H1("Fraud Detection - Monthly Analysis", style={'textAlign': 'center'}),
-    dcc.Graph(id='fraud-by-month', figure=fig_month)
-])
+def serve_layout():
+    return html.Div([
+        html.H1("Fraud Detection - Monthly Analysis", style={'textAlign': 'center'}),
+        dcc.Graph(id='fraud-by-month', figure=build_figure())
+    ])
+
+# Built on every page load so batches appended to the aggregates show up
+# without a restart.
+app.layout = serve_layout
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8050)), debug=False)
@@ -5,309 +5,300 @@ import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 from dash import dcc, html, Input, Output, dash_table
+from fraud_aggregates import summarize
+from fraud_data import MONTH_ORDER
+from fraud_index import load_time_index
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+time_index = load_time_index()
 
-df['transaction_date'] = pd.to_datetime(df['trans_date_trans_time'])
-df['month'] = df['transaction_date'].dt.month
-df['day_of_week'] = df['transaction_date'].dt.day_name()
-df['hour'] = df['transaction_date'].dt.hour
-df['date_only'] = df['transaction_date'].dt.date
+month_names = dict(enumerate(MONTH_ORDER, start=1))
 
-month_names = {
-    1: 'January', 2: 'February', 3: 'March', 4: 'April',
-    5: 'May', 6: 'June', 7: 'July', 8: 'August',
-    9: 'September', 10: 'October', 11: 'November', 12: 'December'
-}
-df['month_name'] = df['month'].map(month_names)
-
-total_transactions = len(df)
-fraud_transactions = len(df[df['is_fraud'] == 1])
-fraud_rate = (fraud_transactions / total_transactions) * 100
-legitimate_transactions = total_transactions - fraud_transactions
-
-monthly_stats = df.groupby(['month', 'month_name']).agg({
-    'is_fraud': ['count', 'sum', 'mean'],
-    'amt': ['mean', 'sum', 'std']
-}).reset_index()
-monthly_stats.columns = ['month_num', 'month', 'total_transactions', 'fraud_count', 'fraud_rate', 
-                        'avg_amount', 'total_amount', 'amount_std']
-monthly_stats['fraud_rate'] = monthly_stats['fraud_rate'] * 100
-monthly_stats = monthly_stats.sort_values('month_num').reset_index(drop=True)
+def month_table(month_counts):
+    table = month_counts[['transactions', 'frauds', 'fraud_rate', 'avg_amount', 'total_amount', 'amount_std']].reset_index()
+    table.columns = ['month_num', 'total_transactions', 'fraud_count', 'fraud_rate',
+                     'avg_amount', 'total_amount', 'amount_std']
+    table.insert(1, 'month', table['month_num'].map(month_names))
+    table['amount_std'] = table['amount_std'].where(table['total_transactions'] > 1, 0)
+    return table
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP])
 
-app.layout = dbc.Container([
-    # Header
-    dbc.Row([
-        dbc.Col([
-            html.H1([
-                html.I(className="bi bi-shield-exclamation me-2"),
-                "Monthly Fraud Detection Dashboard"
-            ], className="text-center mb-4 mt-3", style={'color': '#2E86AB', 'font-weight': 'bold'})
-        ], width=12)
-    ]),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5([
-                        html.I(className="bi bi-sliders me-2"),
-                        "Date Range Filter"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Select Date Range:", className="fw-bold"),
-                            dcc.DatePickerRange(
-                                id='date-picker-range',
-                                start_date=df['transaction_date'].min(),
-                                end_date=df['transaction_date'].max(),
-                                display_format='YYYY-MM-DD',
-                                style={'width': '100%'}
-                            )
-                        ], width=6),
-                        dbc.Col([
-                            html.Label("Chart Type:", className="fw-bold"),
-                            dcc.Dropdown(
-                                id='chart-type-dropdown',
-                                options=[
-                                    {'label': 'Bar Chart - Grouped', 'value': 'bar_grouped'},
-                                    {'label': 'Bar Chart - Stacked', 'value': 'bar_stacked'},
-                                    {'label': 'Line Chart - Fraud Rate', 'value': 'line_rate'},
-                                    {'label': 'Area Chart - Transactions', 'value': 'area_trans'}
-                                ],
-                                value='bar_grouped',
-                                clearable=False
-                            )
-                        ], width=6)
+def serve_layout():
+    return dbc.Container([
+        # Header
+        dbc.Row([
+            dbc.Col([
+                html.H1([
+                    html.I(className="bi bi-shield-exclamation me-2"),
+                    "Monthly Fraud Detection Dashboard"
+                ], className="text-center mb-4 mt-3", style={'color': '#2E86AB', 'font-weight': 'bold'})
+            ], width=12)
+        ]),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5([
+                            html.I(className="bi bi-sliders me-2"),
+                            "Date Range Filter"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Select Date Range:", className="fw-bold"),
+                                dcc.DatePickerRange(
+                                    id='date-picker-range',
+                                    start_date=time_index.start,
+                                    end_date=time_index.end,
+                                    display_format='YYYY-MM-DD',
+                                    style={'width': '100%'}
+                                )
+                            ], width=6),
+                            dbc.Col([
+                                html.Label("Chart Type:", className="fw-bold"),
+                                dcc.Dropdown(
+                                    id='chart-type-dropdown',
+                                    options=[
+                                        {'label': 'Bar Chart - Grouped', 'value': 'bar_grouped'},
+                                        {'label': 'Bar Chart - Stacked', 'value': 'bar_stacked'},
+                                        {'label': 'Line Chart - Fraud Rate', 'value': 'line_rate'},
+                                        {'label': 'Area Chart - Transactions', 'value': 'area_trans'}
+                                    ],
+                                    value='bar_grouped',
+                                    clearable=False
+                                )
+                            ], width=6)
+                        ])
                     ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-graph-up me-2"),
-                        "Total Transactions"
-                    ], className="card-title text-center"),
-                    html.H2(id="total-transactions", className="text-center text-primary", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
+            ], width=12)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-graph-up me-2"),
+                            "Total Transactions"
+                        ], className="card-title text-center"),
+                        html.H2(id="total-transactions", className="text-center text-primary", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-exclamation-triangle me-2"),
-                        "Fraudulent"
-                    ], className="card-title text-center"),
-                    html.H2(id="fraud-transactions", className="text-center text-danger", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-exclamation-triangle me-2"),
+                            "Fraudulent"
+                        ], className="card-title text-center"),
+                        html.H2(id="fraud-transactions", className="text-center text-danger", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-percent me-2"),
-                        "Fraud Rate"
-                    ], className="card-title text-center"),
-                    html.H2(id="fraud-rate", className="text-center text-warning", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-percent me-2"),
+                            "Fraud Rate"
+                        ], className="card-title text-center"),
+                        html.H2(id="fraud-rate", className="text-center text-warning", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-calendar3 me-2"),
-                        "Peak Fraud Month"
-                    ], className="card-title text-center"),
-                    html.H2(id="peak-month", className="text-center text-info", 
-                           style={'font-weight': 'bold', 'font-size': '1.2rem'})
-                ])
-            ], color="light", outline=True)
-        ], width=3)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-bar-chart me-2"),
-                        "Monthly Fraud Analysis"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='main-chart')
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-calendar3 me-2"),
+                            "Peak Fraud Month"
+                        ], className="card-title text-center"),
+                        html.H2(id="peak-month", className="text-center text-info", 
+                               style={'font-weight': 'bold', 'font-size': '1.2rem'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-bar-chart me-2"),
+                            "Monthly Fraud Analysis"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='main-chart')
+                    ])
                 ])
-            ])
-        ], width=8),
+            ], width=8),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-pie-chart me-2"),
-                        "Overall Distribution"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='fraud-pie-chart')
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-pie-chart me-2"),
+                            "Overall Distribution"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='fraud-pie-chart')
+                    ])
                 ])
-            ])
-        ], width=4)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-graph-up-arrow me-2"),
-                        "Monthly Fraud Rate Trend"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='fraud-rate-chart')
+            ], width=4)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-graph-up-arrow me-2"),
+                            "Monthly Fraud Rate Trend"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='fraud-rate-chart')
+                    ])
                 ])
-            ])
-        ], width=6),
+            ], width=6),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-currency-dollar me-2"),
-                        "Monthly Transaction Amounts"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='amount-chart')
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-currency-dollar me-2"),
+                            "Monthly Transaction Amounts"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='amount-chart')
+                    ])
                 ])
-            ])
-        ], width=6)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-speedometer2 me-2"),
-                        "Fraud Rate Gauge by Month"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='gauge-chart')
+            ], width=6)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-speedometer2 me-2"),
+                            "Fraud Rate Gauge by Month"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='gauge-chart')
+                    ])
                 ])
-            ])
-        ], width=6),
+            ], width=6),
         
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-activity me-2"),
-                        "Monthly Transaction Volume Heatmap"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Graph(id='heatmap-chart')
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-activity me-2"),
+                            "Monthly Transaction Volume Heatmap"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Graph(id='heatmap-chart')
+                    ])
                 ])
-            ])
-        ], width=6)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-table me-2"),
-                        "Monthly Statistics Summary"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    dash_table.DataTable(
-                        id='monthly-stats-table',
-                        columns=[
-                            {'name': 'Month', 'id': 'month'},
-                            {'name': 'Total Transactions', 'id': 'total_transactions', 'type': 'numeric', 'format': {'specifier': ','}},
-                            {'name': 'Fraud Count', 'id': 'fraud_count', 'type': 'numeric', 'format': {'specifier': ','}},
-                            {'name': 'Fraud Rate (%)', 'id': 'fraud_rate', 'type': 'numeric', 'format': {'specifier': '.2f'}},
-                            {'name': 'Avg Amount ($)', 'id': 'avg_amount', 'type': 'numeric', 'format': {'specifier': ',.2f'}},
-                            {'name': 'Total Amount ($)', 'id': 'total_amount', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
-                            {'name': 'Amount Std Dev', 'id': 'amount_std', 'type': 'numeric', 'format': {'specifier': ',.2f'}}
-                        ],
-                        style_cell={'textAlign': 'center', 'padding': '10px', 'font-size': '12px'},
-                        style_header={'backgroundColor': '#2E86AB', 'color': 'white', 'fontWeight': 'bold'},
-                        style_data_conditional=[
-                            {
-                                'if': {'row_index': 'odd'},
-                                'backgroundColor': 'rgb(248, 248, 248)'
-                            },
-                            {
-                                'if': {'filter_query': '{fraud_rate} > 5', 'column_id': 'fraud_rate'},
-                                'backgroundColor': '#ffcccc',
-                                'color': 'red',
-                                'fontWeight': 'bold'
-                            },
-                            {
-                                'if': {'filter_query': '{fraud_rate} > 3', 'column_id': 'fraud_rate'},
-                                'backgroundColor': '#fff3cd',
-                                'color': 'orange'
-                            }
-                        ],
-                        sort_action="native",
-                        style_table={'overflowX': 'scroll'}
-                    )
+            ], width=6)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-table me-2"),
+                            "Monthly Statistics Summary"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        dash_table.DataTable(
+                            id='monthly-stats-table',
+                            columns=[
+                                {'name': 'Month', 'id': 'month'},
+                                {'name': 'Total Transactions', 'id': 'total_transactions', 'type': 'numeric', 'format': {'specifier': ','}},
+                                {'name': 'Fraud Count', 'id': 'fraud_count', 'type': 'numeric', 'format': {'specifier': ','}},
+                                {'name': 'Fraud Rate (%)', 'id': 'fraud_rate', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                                {'name': 'Avg Amount ($)', 'id': 'avg_amount', 'type': 'numeric', 'format': {'specifier': ',.2f'}},
+                                {'name': 'Total Amount ($)', 'id': 'total_amount', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
+                                {'name': 'Amount Std Dev', 'id': 'amount_std', 'type': 'numeric', 'format': {'specifier': ',.2f'}}
+                            ],
+                            style_cell={'textAlign': 'center', 'padding': '10px', 'font-size': '12px'},
+                            style_header={'backgroundColor': '#2E86AB', 'color': 'white', 'fontWeight': 'bold'},
+                            style_data_conditional=[
+                                {
+                                    'if': {'row_index': 'odd'},
+                                    'backgroundColor': 'rgb(248, 248, 248)'
+                                },
+                                {
+                                    'if': {'filter_query': '{fraud_rate} > 5', 'column_id': 'fraud_rate'},
+                                    'backgroundColor': '#ffcccc',
+                                    'color': 'red',
+                                    'fontWeight': 'bold'
+                                },
+                                {
+                                    'if': {'filter_query': '{fraud_rate} > 3', 'column_id': 'fraud_rate'},
+                                    'backgroundColor': '#fff3cd',
+                                    'color': 'orange'
+                                }
+                            ],
+                            sort_action="native",
+                            style_table={'overflowX': 'scroll'}
+                        )
+                    ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-lightbulb me-2"),
-                        "Monthly Analysis Insights"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    html.Div(id="insights-content")
+            ], width=12)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-lightbulb me-2"),
+                            "Monthly Analysis Insights"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        html.Div(id="insights-content")
+                    ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            html.Hr(),
-            html.P([
-                html.I(className="bi bi-info-circle me-2"),
-                "Monthly Fraud Detection System - Advanced Analytics Dashboard"
-            ], className="text-center text-muted")
-        ], width=12)
-    ])
+            ], width=12)
+        ], className="mb-4"),
+    
+        dbc.Row([
+            dbc.Col([
+                html.Hr(),
+                html.P([
+                    html.I(className="bi bi-info-circle me-2"),
+                    "Monthly Fraud Detection System - Advanced Analytics Dashboard"
+                ], className="text-center text-muted")
+            ], width=12)
+        ])
     
-], fluid=True)
+    ], fluid=True)
+
+# Built on every page load so the date range covers batches appended to the
+# time index without a restart.
+app.layout = serve_layout
 
 @app.callback(
     [Output('total-transactions', 'children'),
@@ -327,38 +318,37 @@ app.layout = dbc.Container([
      Input('chart-type-dropdown', 'value')]
 )
 def update_dashboard(start_date, end_date, chart_type):
-    filtered_df = df[(df['transaction_date'] >= start_date) & (df['transaction_date'] <= end_date)]
+    month_sums = time_index.rollup(start_date, end_date)
     
-    total_trans = len(filtered_df)
-    fraud_trans = len(filtered_df[filtered_df['is_fraud'] == 1])
+    total_trans = int(month_sums['count'].sum())
+    fraud_trans = int(month_sums['frauds'].sum())
     fraud_rt = (fraud_trans / total_trans) * 100 if total_trans > 0 else 0
     
-    monthly_stats_filtered = filtered_df.groupby(['month', 'month_name']).agg({
-        'is_fraud': ['count', 'sum', 'mean'],
-        'amt': ['mean', 'sum', 'std']
-    }).reset_index()
-    monthly_stats_filtered.columns = ['month_num', 'month', 'total_transactions', 'fraud_count', 'fraud_rate', 
-                                    'avg_amount', 'total_amount', 'amount_std']
-    monthly_stats_filtered['fraud_rate'] = monthly_stats_filtered['fraud_rate'] * 100
-    monthly_stats_filtered = monthly_stats_filtered.fillna(0)
-    monthly_stats_filtered = monthly_stats_filtered.sort_values('month_num').reset_index(drop=True)
+    monthly_stats_filtered = month_table(summarize(month_sums))
     
     peak_month = monthly_stats_filtered.loc[monthly_stats_filtered['fraud_rate'].idxmax(), 'month'] if len(monthly_stats_filtered) > 0 else "N/A"
     
+    status_counts = pd.concat([
+        pd.DataFrame({'month_name': monthly_stats_filtered['month'], 'is_fraud': '0',
+                      'count': monthly_stats_filtered['total_transactions'] - monthly_stats_filtered['fraud_count']}),
+        pd.DataFrame({'month_name': monthly_stats_filtered['month'], 'is_fraud': '1',
+                      'count': monthly_stats_filtered['fraud_count']})
+    ])
+    
     if chart_type == 'bar_grouped':
-        main_fig = px.histogram(
-            filtered_df, x='month_name', color='is_fraud',
-            category_orders={'month_name': list(month_names.values())},
+        main_fig = px.bar(
+            status_counts, x='month_name', y='count', color='is_fraud',
+            category_orders={'month_name': list(month_names.values()), 'is_fraud': ['0', '1']},
             barmode='group', opacity=0.8,
-            color_discrete_map={0: '#2E86AB', 1: '#FFA500'},
+            color_discrete_map={'0': '#2E86AB', '1': '#FFA500'},
             title="Monthly Transactions - Grouped by Fraud Status"
         )
     elif chart_type == 'bar_stacked':
-        main_fig = px.histogram(
-            filtered_df, x='month_name', color='is_fraud',
-            category_orders={'month_name': list(month_names.values())},
+        main_fig = px.bar(
+            status_counts, x='month_name', y='count', color='is_fraud',
+            category_orders={'month_name': list(month_names.values()), 'is_fraud': ['0', '1']},
             barmode='stack', opacity=0.8,
-            color_discrete_map={0: '#2E86AB', 1: '#FFA500'},
+            color_discrete_map={'0': '#2E86AB', '1': '#FFA500'},
             title="Monthly Transactions - Stacked by Fraud Status"
         )
     elif chart_type == 'line_rate':
@@ -377,8 +367,7 @@ def update_dashboard(start_date, end_date, chart_type):
     
     main_fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
     
-    fraud_counts = filtered_df['is_fraud'].value_counts()
-    pie_fig = px.pie(values=fraud_counts.values, names=['Legitimate', 'Fraudulent'], 
+    pie_fig = px.pie(values=[total_trans - fraud_trans, fraud_trans], names=['Legitimate', 'Fraudulent'], 
                      color_discrete_map={'Legitimate': '#2E86AB', 'Fraudulent': '#FFA500'},
                      title="Overall Fraud Distribution")
     pie_fig.update_layout(paper_bgcolor='rgba(0,0,0,0)')
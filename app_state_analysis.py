@@ -1,16 +1,13 @@
 import os
 import dash
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 from dash import dcc, html, Input, Output
+from functools import lru_cache
+from fraud_cube import load_cube
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
-
-fraud_by_state = df.groupby('state')['is_fraud'].agg(['mean', 'count']).reset_index()
-fraud_by_state['fraud_rate'] = fraud_by_state['mean'] * 100
-fraud_by_state.rename(columns={'mean': 'fraud_ratio'}, inplace=True)
+cube = load_cube()
 
 state_coords = {
     'AL': {'lat': 32.806671, 'lon': -86.791130, 'name': 'Alabama'},
@@ -66,210 +63,229 @@ state_coords = {
     'DC': {'lat': 38.897438, 'lon': -77.026817, 'name': 'Washington DC'}
 }
 
-fraud_by_state_coords = fraud_by_state.copy()
-fraud_by_state_coords['lat'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('lat'))
-fraud_by_state_coords['lon'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('lon'))
-fraud_by_state_coords['state_name'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('name', x))
+@lru_cache(maxsize=1)
+def state_tables_for_version(version):
+    state_table = cube.stats('state')
+    fraud_by_state = state_table[['transactions']].rename(columns={'transactions': 'count'}).reset_index()
+    fraud_by_state['fraud_ratio'] = (state_table['frauds'] / state_table['transactions']).to_numpy()
+    fraud_by_state['fraud_rate'] = fraud_by_state['fraud_ratio'] * 100
+
+    fraud_by_state_coords = fraud_by_state.copy()
+    fraud_by_state_coords['lat'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('lat'))
+    fraud_by_state_coords['lon'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('lon'))
+    fraud_by_state_coords['state_name'] = fraud_by_state_coords['state'].map(lambda x: state_coords.get(x, {}).get('name', x))
+    return fraud_by_state, fraud_by_state_coords
+
+def state_tables():
+    return state_tables_for_version(cube.version)
 
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP])
 
-app.layout = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            html.H1([
-                html.I(className="bi bi-map-fill me-2"),
-                "Enhanced State Fraud Analysis"
-            ], className="text-center mb-4 mt-3", style={'color': '#2E86AB', 'font-weight': 'bold'})
-        ], width=12)
-    ]),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H5([
-                        html.I(className="bi bi-gear me-2"),
-                        "Map Customization"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    dbc.Row([
-                        dbc.Col([
-                            html.Label("Color Scale:", className="fw-bold"),
-                            dcc.Dropdown(
-                                id='color-scale-dropdown',
-                                options=[
-                                    {'label': 'Blues (Reverse)', 'value': 'Blues_r'},
-                                    {'label': 'Reds', 'value': 'Reds'},
-                                    {'label': 'Viridis', 'value': 'Viridis'},
-                                    {'label': 'Plasma', 'value': 'Plasma'},
-                                    {'label': 'RdYlBu (Reverse)', 'value': 'RdYlBu_r'},
-                                    {'label': 'Spectral', 'value': 'Spectral'}
-                                ],
-                                value='Blues_r',
-                                clearable=False
-                            )
-                        ], width=3),
-                        dbc.Col([
-                            html.Label("Show State Names:", className="fw-bold"),
-                            dbc.Switch(
-                                id="show-names-switch",
-                                label="Display Names on Map",
-                                value=True,
-                            )
-                        ], width=3),
-                        dbc.Col([
-                            html.Label("Text Size:", className="fw-bold"),
-                            dcc.Slider(
-                                id='text-size-slider',
-                                min=8, max=16, step=1, value=11,
-                                marks={i: str(i) for i in range(8, 17, 2)},
-                                tooltip={"placement": "bottom", "always_visible": True}
-                            )
-                        ], width=3),
-                        dbc.Col([
-                            html.Label("Name Display:", className="fw-bold"),
-                            dcc.Dropdown(
-                                id='name-type-dropdown',
-                                options=[
-                                    {'label': 'State Codes (TX, CA)', 'value': 'code'},
-                                    {'label': 'Full Names (Texas, California)', 'value': 'full'},
-                                    {'label': 'Code + Rate (TX: 2.5%)', 'value': 'code_rate'},
-                                    {'label': 'Full + Rate (Texas: 2.5%)', 'value': 'full_rate'}
-                                ],
-                                value='code_rate',
-                                clearable=False
-                            )
-                        ], width=3)
+def serve_layout():
+    fraud_by_state = state_tables()[0]
+
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                html.H1([
+                    html.I(className="bi bi-map-fill me-2"),
+                    "Enhanced State Fraud Analysis"
+                ], className="text-center mb-4 mt-3", style={'color': '#2E86AB', 'font-weight': 'bold'})
+            ], width=12)
+        ]),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H5([
+                            html.I(className="bi bi-gear me-2"),
+                            "Map Customization"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        dbc.Row([
+                            dbc.Col([
+                                html.Label("Color Scale:", className="fw-bold"),
+                                dcc.Dropdown(
+                                    id='color-scale-dropdown',
+                                    options=[
+                                        {'label': 'Blues (Reverse)', 'value': 'Blues_r'},
+                                        {'label': 'Reds', 'value': 'Reds'},
+                                        {'label': 'Viridis', 'value': 'Viridis'},
+                                        {'label': 'Plasma', 'value': 'Plasma'},
+                                        {'label': 'RdYlBu (Reverse)', 'value': 'RdYlBu_r'},
+                                        {'label': 'Spectral', 'value': 'Spectral'}
+                                    ],
+                                    value='Blues_r',
+                                    clearable=False
+                                )
+                            ], width=3),
+                            dbc.Col([
+                                html.Label("Show State Names:", className="fw-bold"),
+                                dbc.Switch(
+                                    id="show-names-switch",
+                                    label="Display Names on Map",
+                                    value=True,
+                                )
+                            ], width=3),
+                            dbc.Col([
+                                html.Label("Text Size:", className="fw-bold"),
+                                dcc.Slider(
+                                    id='text-size-slider',
+                                    min=8, max=16, step=1, value=11,
+                                    marks={i: str(i) for i in range(8, 17, 2)},
+                                    tooltip={"placement": "bottom", "always_visible": True}
+                                )
+                            ], width=3),
+                            dbc.Col([
+                                html.Label("Name Display:", className="fw-bold"),
+                                dcc.Dropdown(
+                                    id='name-type-dropdown',
+                                    options=[
+                                        {'label': 'State Codes (TX, CA)', 'value': 'code'},
+                                        {'label': 'Full Names (Texas, California)', 'value': 'full'},
+                                        {'label': 'Code + Rate (TX: 2.5%)', 'value': 'code_rate'},
+                                        {'label': 'Full + Rate (Texas: 2.5%)', 'value': 'full_rate'}
+                                    ],
+                                    value='code_rate',
+                                    clearable=False
+                                )
+                            ], width=3)
+                        ])
                     ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-flag me-2"),
-                        "States Analyzed"
-                    ], className="card-title text-center"),
-                    html.H2(f"{len(fraud_by_state)}", className="text-center text-primary", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-exclamation-triangle me-2"),
-                        "Highest Risk State"
-                    ], className="card-title text-center"),
-                    html.H2(f"{fraud_by_state.loc[fraud_by_state['fraud_rate'].idxmax(), 'state']}", 
-                           className="text-center text-danger", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-percent me-2"),
-                        "Max Fraud Rate"
-                    ], className="card-title text-center"),
-                    html.H2(f"{fraud_by_state['fraud_rate'].max():.2f}%", 
-                           className="text-center text-warning", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4([
-                        html.I(className="bi bi-graph-down me-2"),
-                        "Safest State"
-                    ], className="card-title text-center"),
-                    html.H2(f"{fraud_by_state.loc[fraud_by_state['fraud_rate'].idxmin(), 'state']}", 
-                           className="text-center text-success", 
-                           style={'font-weight': 'bold'})
-                ])
-            ], color="light", outline=True)
-        ], width=3)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-map me-2"),
-                        "Interactive State Fraud Rate Map"
-                    ], className="mb-0 text-center")
-                ]),
-                dbc.CardBody([
-                    dcc.Loading(
-                        dcc.Graph(id='enhanced-choropleth-map', style={'height': '700px'}),
-                        type="circle", color="#2E86AB"
-                    )
+            ], width=12)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-flag me-2"),
+                            "States Analyzed"
+                        ], className="card-title text-center"),
+                        html.H2(f"{len(fraud_by_state)}", className="text-center text-primary", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-exclamation-triangle me-2"),
+                            "Highest Risk State"
+                        ], className="card-title text-center"),
+                        html.H2(f"{fraud_by_state.loc[fraud_by_state['fraud_rate'].idxmax(), 'state']}", 
+                               className="text-center text-danger", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-percent me-2"),
+                            "Max Fraud Rate"
+                        ], className="card-title text-center"),
+                        html.H2(f"{fraud_by_state['fraud_rate'].max():.2f}%", 
+                               className="text-center text-warning", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4([
+                            html.I(className="bi bi-graph-down me-2"),
+                            "Safest State"
+                        ], className="card-title text-center"),
+                        html.H2(f"{fraud_by_state.loc[fraud_by_state['fraud_rate'].idxmin(), 'state']}", 
+                               className="text-center text-success", 
+                               style={'font-weight': 'bold'})
+                    ])
+                ], color="light", outline=True)
+            ], width=3)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-map me-2"),
+                            "Interactive State Fraud Rate Map"
+                        ], className="mb-0 text-center")
+                    ]),
+                    dbc.CardBody([
+                        dcc.Loading(
+                            dcc.Graph(id='enhanced-choropleth-map', style={'height': '700px'}),
+                            type="circle", color="#2E86AB"
+                        )
+                    ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-list-ol me-2"),
-                        "Top 10 Highest Risk States"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    html.Div(id="top-risk-states")
+            ], width=12)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-list-ol me-2"),
+                            "Top 10 Highest Risk States"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        html.Div(id="top-risk-states")
+                    ])
                 ])
-            ])
-        ], width=6),
-        
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-shield-check me-2"),
-                        "Top 10 Safest States"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    html.Div(id="safest-states")
+            ], width=6),
+
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-shield-check me-2"),
+                            "Top 10 Safest States"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        html.Div(id="safest-states")
+                    ])
                 ])
-            ])
-        ], width=6)
-    ], className="mb-4"),
-    
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader([
-                    html.H4([
-                        html.I(className="bi bi-lightbulb-fill me-2"),
-                        "State-Level Strategic Insights"
-                    ], className="mb-0")
-                ]),
-                dbc.CardBody([
-                    html.Div(id="state-insights")
+            ], width=6)
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader([
+                        html.H4([
+                            html.I(className="bi bi-lightbulb-fill me-2"),
+                            "State-Level Strategic Insights"
+                        ], className="mb-0")
+                    ]),
+                    dbc.CardBody([
+                        html.Div(id="state-insights")
+                    ])
                 ])
-            ])
-        ], width=12)
-    ])
-    
-], fluid=True)
+            ], width=12)
+        ])
+
+    ], fluid=True)
+
+
+# Built on every page load so batches appended to the cube show up
+# without a restart.
+app.layout = serve_layout
 
 @app.callback(
     [Output('enhanced-choropleth-map', 'figure'),
@@ -282,6 +298,7 @@ app.layout = dbc.Container([
      Input('name-type-dropdown', 'value')]
 )
 def update_map(color_scale, show_names, text_size, name_type):
+    fraud_by_state, fraud_by_state_coords = state_tables()
     fig = px.choropleth(
         fraud_by_state,
         locations='state',
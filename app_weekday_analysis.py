@@ -1,41 +1,58 @@
 import os
 import dash
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from dash import dcc, html, Input, Output, dash_table
+from functools import lru_cache
+from fraud_aggregates import load_aggregates
+from fraud_cube import load_cube
+from fraud_data import DAY_ORDER
 
-df = pd.read_csv('eda_fraud_balanced_sorted.csv')
+cube = load_cube()
+aggregates = load_aggregates()
 
-filtered_df = None
+day_order = DAY_ORDER
 
-df['transaction_date'] = pd.to_datetime(df['trans_date_trans_time'])
-df['day_of_week'] = df['transaction_date'].dt.dayofweek
-day_names = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday',
-             4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
-df['day_of_week'] = df['day_of_week'].map(day_names)
+# Everything the callback shows is derived from these tables, built once per
+# cube version and only read afterwards, so concurrent requests share them
+# safely and appended batches show up on the next update.
+@lru_cache(maxsize=1)
+def day_tables_for_version(version):
+    day_fraud_counts = cube.rollup('day_of_week', 'is_fraud')
 
-daily_stats = df.groupby('day_of_week').agg({
-    'is_fraud': ['count', 'sum'],
-    'amt': ['mean', 'sum']
-}).reset_index()
+    day_counts = cube.stats('day_of_week')
+    daily_stats = pd.DataFrame({
+        'Day': pd.Categorical([day_order[day] for day in day_counts.index], categories=day_order, ordered=True),
+        'Total_Transactions': day_counts['transactions'].to_numpy(),
+        'Total_Frauds': day_counts['frauds'].to_numpy(),
+        'Avg_Amount': day_counts['avg_amount'].to_numpy(),
+        'Total_Amount': day_counts['total_amount'].to_numpy()
+    }, index=day_counts.index)
+    daily_stats['Fraud_Rate'] = (daily_stats['Total_Frauds'] / daily_stats['Total_Transactions'] * 100).round(2)
+    return day_fraud_counts, daily_stats
 
-daily_stats.columns = ['Day', 'Total_Transactions', 'Total_Frauds', 'Avg_Amount', 'Total_Amount']
-daily_stats['Fraud_Rate'] = (daily_stats['Total_Frauds'] / daily_stats['Total_Transactions'] * 100).round(2)
+def day_tables():
+    return day_tables_for_version(cube.version)
 
-day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-daily_stats['Day'] = pd.Categorical(daily_stats['Day'], categories=day_order, ordered=True)
-daily_stats = daily_stats.sort_values('Day')
+def select_days(table, days):
+    return table[table.index.get_level_values('day_of_week').isin(days)]
 
-def create_fraud_histogram(data_df):
-    fig = px.histogram(data_df, x='day_of_week', color='is_fraud',
-                       category_orders={'day_of_week': day_order},
-                       title='Fraud Occurrence by Day of the Week',
-                       labels={'day_of_week': 'Day of the Week', 'count': 'Number of Transactions'},
-                       barmode='group',
-                       opacity=0.8,
-                       height=500,
-                       color_discrete_map={0: 'lightblue', 1: 'orange'})
+def create_fraud_histogram(selected_day_fraud):
+    counts = pd.DataFrame({
+        'day_of_week': [day_order[day] for day in selected_day_fraud.index.get_level_values('day_of_week')],
+        'is_fraud': selected_day_fraud.index.get_level_values('is_fraud').astype(str),
+        'count': selected_day_fraud['count'].to_numpy()
+    })
+    fig = px.bar(counts, x='day_of_week', y='count', color='is_fraud',
+                 category_orders={'day_of_week': day_order, 'is_fraud': ['0', '1']},
+                 title='Fraud Occurrence by Day of the Week',
+                 labels={'day_of_week': 'Day of the Week', 'count': 'Number of Transactions'},
+                 barmode='group',
+                 opacity=0.8,
+                 height=500,
+                 color_discrete_map={'0': 'lightblue', '1': 'orange'})
     
     fig.for_each_trace(lambda t: t.update(name='Normal' if t.name == '0' else 'Fraud'))
     
@@ -43,18 +60,7 @@ def create_fraud_histogram(data_df):
     
     return fig
 
-def create_fraud_rate_chart(data_df):
-    filtered_daily_stats = data_df.groupby('day_of_week').agg({
-        'is_fraud': ['count', 'sum'],
-        'amt': ['mean', 'sum']
-    }).reset_index()
-    
-    filtered_daily_stats.columns = ['Day', 'Total_Transactions', 'Total_Frauds', 'Avg_Amount', 'Total_Amount']
-    filtered_daily_stats['Fraud_Rate'] = (filtered_daily_stats['Total_Frauds'] / filtered_daily_stats['Total_Transactions'] * 100).round(2)
-    
-    filtered_daily_stats['Day'] = pd.Categorical(filtered_daily_stats['Day'], categories=day_order, ordered=True)
-    filtered_daily_stats = filtered_daily_stats.sort_values('Day')
-    
+def create_fraud_rate_chart(filtered_daily_stats):
     fig = px.line(filtered_daily_stats, x='Day', y='Fraud_Rate',
                   title='Fraud Rate by Day of Week',
                   markers=True,
@@ -64,17 +70,18 @@ def create_fraud_rate_chart(data_df):
     fig.update_layout(yaxis_title='Fraud Rate (%)')
     return fig
 
-def create_amount_analysis(data_df):
-    fraud_amounts = data_df[data_df['is_fraud'] == 1].groupby('day_of_week')['amt'].mean().reset_index()
-    normal_amounts = data_df[data_df['is_fraud'] == 0].groupby('day_of_week')['amt'].mean().reset_index()
+def create_amount_analysis(selected_day_fraud):
+    avg_amounts = (selected_day_fraud['amt_sum'] / selected_day_fraud['count']).unstack('is_fraud')
+    fraud_amounts = avg_amounts[1].dropna() if 1 in avg_amounts else pd.Series(dtype=float)
+    normal_amounts = avg_amounts[0].dropna() if 0 in avg_amounts else pd.Series(dtype=float)
     
     fig = go.Figure()
     
     if not fraud_amounts.empty:
-        fig.add_trace(go.Bar(x=fraud_amounts['day_of_week'], y=fraud_amounts['amt'],
+        fig.add_trace(go.Bar(x=[day_order[day] for day in fraud_amounts.index], y=fraud_amounts.to_numpy(),
                              name='Fraud Avg Amount', marker_color='#27ae60', opacity=0.7))
     if not normal_amounts.empty:
-        fig.add_trace(go.Bar(x=normal_amounts['day_of_week'], y=normal_amounts['amt'],
+        fig.add_trace(go.Bar(x=[day_order[day] for day in normal_amounts.index], y=normal_amounts.to_numpy(),
                              name='Normal Avg Amount', marker_color='lightblue', opacity=0.7))
     
     fig.update_layout(title='Average Transaction Amount by Day',
@@ -84,21 +91,11 @@ def create_amount_analysis(data_df):
                       height=400)
     return fig
 
-def create_heatmap(data_df):
-    df_temp = data_df.copy()
-    df_temp['hour'] = df_temp['transaction_date'].dt.hour
-    heatmap_data = df_temp.groupby(['day_of_week', 'hour'])['is_fraud'].sum().reset_index()
-    
-    heatmap_pivot = heatmap_data.pivot(index='hour', columns='day_of_week', values='is_fraud')
-    
-    for day in day_order:
-        if day not in heatmap_pivot.columns:
-            heatmap_pivot[day] = 0
-    
-    heatmap_pivot = heatmap_pivot.reindex(columns=day_order)
-    heatmap_pivot = heatmap_pivot.fillna(0)  
+def create_heatmap(selected_days):
+    day_hour_frauds = aggregates.matrix('day_of_week', 'hour')['frauds']
+    heatmap_pivot = day_hour_frauds.mul(np.isin(np.arange(len(day_order)), selected_days), axis=0)
     
-    fig = px.imshow(heatmap_pivot.T, 
+    fig = px.imshow(heatmap_pivot, 
                     title='Fraud Heatmap: Day vs Hour',
                     labels=dict(x="Hour", y="Day", color="Fraud Count"),
                     aspect="auto",
@@ -166,37 +163,27 @@ app.layout = html.Div([
      Input('day-filter', 'value')]
 )
 def update_dashboard(chart_type, day_filter):
-    global filtered_df
-    
-    filtered_df = df.copy()
+    selected_days = list(range(7))
     
     if day_filter != ['all'] and isinstance(day_filter, list) and len(day_filter) > 0:
-        filtered_df = filtered_df[filtered_df['day_of_week'].isin(day_filter)]
+        selected_days = [day_order.index(day) for day in day_filter if day in day_order]
+    
+    day_fraud_counts, daily_stats = day_tables()
+    filtered_daily_stats = daily_stats.loc[daily_stats.index.intersection(selected_days)]
     
-    if filtered_df.empty:
+    if filtered_daily_stats.empty:
         empty_fig = go.Figure()
         empty_fig.update_layout(title="No data available for selected filters")
         return empty_fig, html.Div("No data available"), html.Div("No data available")
     
-    filtered_daily_stats = filtered_df.groupby('day_of_week').agg({
-        'is_fraud': ['count', 'sum'],
-        'amt': ['mean', 'sum']
-    }).reset_index()
-    
-    filtered_daily_stats.columns = ['Day', 'Total_Transactions', 'Total_Frauds', 'Avg_Amount', 'Total_Amount']
-    filtered_daily_stats['Fraud_Rate'] = (filtered_daily_stats['Total_Frauds'] / filtered_daily_stats['Total_Transactions'] * 100).round(2)
-    
-    filtered_daily_stats['Day'] = pd.Categorical(filtered_daily_stats['Day'], categories=day_order, ordered=True)
-    filtered_daily_stats = filtered_daily_stats.sort_values('Day')
-    
     if chart_type == 'histogram':
-        fig = create_fraud_histogram(filtered_df)
+        fig = create_fraud_histogram(select_days(day_fraud_counts, selected_days))
     elif chart_type == 'line':
-        fig = create_fraud_rate_chart(filtered_df)
+        fig = create_fraud_rate_chart(filtered_daily_stats)
     elif chart_type == 'amount':
-        fig = create_amount_analysis(filtered_df)
+        fig = create_amount_analysis(select_days(day_fraud_counts, selected_days))
     elif chart_type == 'heatmap':
-        fig = create_heatmap(filtered_df)
+        fig = create_heatmap(selected_days)
     
     total_transactions = filtered_daily_stats['Total_Transactions'].sum()
     total_frauds = filtered_daily_stats['Total_Frauds'].sum()
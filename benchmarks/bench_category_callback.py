@@ -0,0 +1,57 @@
+"""Merchant-category callback time vs row count.
+
+For each size, imports app_merchant_category on a synthetic CSV in a fresh
+process and times ``update_chart`` (cached category table, threshold and
+figure only) against the per-call ``groupby(['category', 'is_fraud'])``
+over the rows that the callback used to run.
+
+Usage: python benchmarks/bench_category_callback.py [ROWS ...]   (default: 15k 1M 10M)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import parse_sizes, write_transactions
+
+REPEAT = 20
+
+
+def best_of(fn, *args):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def child(path):
+    os.environ['FRAUD_DATA_FILE'] = path
+    import app_merchant_category
+    from fraud_data import load_transactions
+
+    df = load_transactions(path)
+    app_merchant_category.update_chart(0, 'count')
+    callback = best_of(app_merchant_category.update_chart, 5, 'count')
+    groupby = best_of(lambda: df.groupby(['category', 'is_fraud'], observed=True).size().unstack())
+    print(f"{callback * 1000:.2f} {groupby * 1000:.2f}")
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        return child(sys.argv[2])
+    sizes = parse_sizes(sys.argv[1:], [15_000, 1_000_000, 10_000_000])
+    directory = tempfile.mkdtemp(prefix='fraud-bench-')
+    print(f"{'rows':>12} {'callback (ms)':>14} {'groupby (ms)':>13}")
+    for n_rows in sizes:
+        path = write_transactions(n_rows, directory)
+        result = subprocess.run([sys.executable, __file__, '--child', path],
+                                check=True, capture_output=True, text=True)
+        callback, groupby = result.stdout.split()[-2:]
+        print(f"{n_rows:>12,} {float(callback):>14.2f} {float(groupby):>13.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""KDE of transaction amounts: scipy ``gaussian_kde`` vs ``fraud_kde.binned_kde``.
+
+Evaluates both on the app's grid (1000 points over [0, 1500]) with Scott and
+Silverman bandwidths, prints the time of each and the largest difference
+relative to the peak density. ``gaussian_kde`` is O(n * grid) and is only
+run up to ``EXACT_LIMIT`` amounts; beyond that only the binned time is shown.
+
+Usage: python benchmarks/bench_kde.py [AMOUNTS ...]   (default: 15k 1M 10M)
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from synthetic import parse_sizes
+
+from fraud_data import DATA_FILE
+from fraud_kde import AGREEMENT_TOLERANCE, binned_kde
+
+EXACT_LIMIT = 1_000_000
+XLIM = 1500
+GRID_POINTS = 1000
+
+
+def make_amounts(n, seed=0):
+    base = pd.read_csv(DATA_FILE, usecols=['amt'])['amt'].to_numpy()
+    base = base[base <= XLIM]
+    rng = np.random.default_rng(seed)
+    return base[rng.integers(0, len(base), n)] * rng.uniform(0.9, 1.1, n)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    sizes = parse_sizes(sys.argv[1:], [15_000, 1_000_000, 10_000_000])
+    grid = np.linspace(0, XLIM, GRID_POINTS)
+    failed = False
+    print(f"{'amounts':>12} {'bw':>10} {'scipy (s)':>10} {'binned (s)':>11} {'speedup':>8} {'max rel err':>12}")
+    for n in sizes:
+        amounts = make_amounts(n)
+        for bw_method in ('scott', 'silverman'):
+            binned, binned_time = timed(binned_kde, amounts, grid, bw_method)
+            if n > EXACT_LIMIT:
+                print(f"{n:>12,} {bw_method:>10} {'-':>10} {binned_time:>11.4f} {'-':>8} {'-':>12}")
+                continue
+            exact, exact_time = timed(lambda: stats.gaussian_kde(amounts, bw_method)(grid))
+            error = np.abs(binned - exact).max() / exact.max()
+            failed |= error > AGREEMENT_TOLERANCE
+            print(f"{n:>12,} {bw_method:>10} {exact_time:>10.3f} {binned_time:>11.4f} "
+                  f"{exact_time / binned_time:>7.0f}x {error:>12.2e}")
+    if failed:
+        sys.exit('binned_kde disagrees with gaussian_kde by more than %g' % AGREEMENT_TOLERANCE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""Cold CSV parse vs Feather snapshot load.
+
+Usage: python benchmarks/bench_load.py [ROWS ...]   (default: 15k 1M 10M)
+"""
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import parse_sizes, write_transactions
+
+import fraud_data
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = parse_sizes(sys.argv[1:], [15_000, 1_000_000, 10_000_000])
+    directory = tempfile.mkdtemp(prefix='fraud-bench-')
+    print(f"{'rows':>12} {'csv (s)':>10} {'write (s)':>10} {'cached (s)':>11} {'speedup':>8}")
+    for n_rows in sizes:
+        path = write_transactions(n_rows, directory)
+        if os.path.exists(fraud_data.cache_path(path)):
+            os.remove(fraud_data.cache_path(path))
+        csv_time, df = timed(fraud_data.read_transactions, path)
+        write_time, _ = timed(fraud_data.write_cache, path, df, fraud_data.source_fingerprint(path))
+        cached_time, _ = timed(fraud_data.read_transactions_cached, path)
+        print(f"{n_rows:>12,} {csv_time:>10.3f} {write_time:>10.3f} "
+              f"{cached_time:>11.3f} {csv_time / cached_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
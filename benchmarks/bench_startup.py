@@ -0,0 +1,73 @@
+"""Time to first byte and time to ready: direct ``app.run`` vs fraud_server.
+
+For each size, starts the dashboard once as ``python APP.py`` (the first
+byte can only come after the import has loaded the data) and once through
+``python fraud_server.py APP`` (``/healthz`` answers at once, ``/readyz``
+turns 200 when the background import finishes).
+
+Usage: python benchmarks/bench_startup.py [APP] [ROWS ...]
+       (default: app_hourly_analysis, 15k 1M)
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from synthetic import parse_sizes, write_transactions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMEOUT = 600
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, started):
+    while time.monotonic() - started < TIMEOUT:
+        try:
+            with urllib.request.urlopen(url, timeout=TIMEOUT) as response:
+                if response.status == 200:
+                    return time.monotonic() - started
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(url)
+
+
+def run(command, env, probes):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), HOST='127.0.0.1', **env)
+    started = time.monotonic()
+    proc = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return [wait_for('http://127.0.0.1:%d%s' % (port, path), started) for path in probes]
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    args = sys.argv[1:]
+    app = args.pop(0).removesuffix('.py') if args and not args[0][0].isdigit() else 'app_hourly_analysis'
+    sizes = parse_sizes(args, [15_000, 1_000_000])
+    directory = tempfile.mkdtemp(prefix='fraud-bench-')
+    print(f"{app}: seconds from process start")
+    print(f"{'rows':>12} {'direct first byte':>18} {'lazy first byte':>16} {'lazy ready':>11}")
+    for n_rows in sizes:
+        env = {'FRAUD_DATA_FILE': write_transactions(n_rows, directory)}
+        # Warm the snapshot so both runs load the same way.
+        run([sys.executable, app + '.py'], env, ['/'])
+        direct, = run([sys.executable, app + '.py'], env, ['/'])
+        first_byte, ready = run([sys.executable, 'fraud_server.py', app], env, ['/healthz', '/readyz'])
+        print(f"{n_rows:>12,} {direct:>18.3f} {first_byte:>16.3f} {ready:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Timestamp parsing: format inference vs the fixed-layout fast path.
+
+Times ``pd.to_datetime`` without a format plus ``.dt`` accessors against
+``fraud_data.parse_timestamps`` plus ``fraud_data.time_parts``, and prints
+the validation report (including unix_time offsets) for the largest size.
+
+Usage: python benchmarks/bench_time_parse.py [ROWS ...]   (default: 15k 1M 10M)
+"""
+import sys
+import time
+
+import pandas as pd
+
+from synthetic import make_transactions, parse_sizes
+
+import fraud_data
+
+
+def inferred(raw):
+    transaction_date = pd.to_datetime(raw)
+    return (transaction_date, transaction_date.dt.hour, transaction_date.dt.dayofweek,
+            transaction_date.dt.month)
+
+
+def fixed(raw):
+    transaction_date = fraud_data.parse_timestamps(raw)
+    return (transaction_date,) + fraud_data.time_parts(transaction_date)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = parse_sizes(sys.argv[1:], [15_000, 1_000_000, 10_000_000])
+    print(f"{'rows':>12} {'inferred (s)':>13} {'fixed (s)':>10} {'speedup':>8}")
+    for n_rows in sizes:
+        df = make_transactions(n_rows)
+        raw = df['trans_date_trans_time'].astype(str)
+        inferred_time = timed(inferred, raw)
+        fixed_time = timed(fixed, raw)
+        print(f"{n_rows:>12,} {inferred_time:>13.3f} {fixed_time:>10.3f} {inferred_time / fixed_time:>7.1f}x")
+    print(fraud_data.check_time_columns(df, fraud_data.add_time_columns(df)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Per-worker memory of the private (Feather) and shared (mmap) load modes.
+
+Starts N independent worker processes per mode, has each load the dataset
+and touch every column, then reports RSS, PSS and USS per worker from
+/proc/<pid>/smaps_rollup (Linux only).
+
+Usage: python benchmarks/measure_worker_memory.py [ROWS] [WORKERS]
+"""
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+
+MODES = {
+    'idle': None,
+    'private': {'FRAUD_DATA_MMAP': '0'},
+    'mmap': {'FRAUD_DATA_MMAP': '1'},
+}
+
+
+def smaps_rollup(pid):
+    fields = {}
+    with open('/proc/%d/smaps_rollup' % pid) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss': fields['Rss'],
+        'pss': fields['Pss'],
+        'uss': fields['Private_Clean'] + fields['Private_Dirty'],
+    }
+
+
+def worker(path, env, loaded, done):
+    import pandas  # noqa: F401  - same interpreter baseline in every mode
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if env is not None:
+        os.environ.update(env, FRAUD_DATA_FILE=path)
+        import fraud_data
+        df = fraud_data.load_transactions(path)
+        for name in df.columns:
+            series = df[name]
+            if hasattr(series, 'cat'):
+                series.array.codes.sum()
+            else:
+                series.to_numpy().view('u1').sum()
+    loaded.wait()
+    done.wait()
+
+
+def measure(path, env, n_workers):
+    ctx = mp.get_context('spawn')
+    loaded = ctx.Barrier(n_workers + 1)
+    done = ctx.Barrier(n_workers + 1)
+    procs = [ctx.Process(target=worker, args=(path, env, loaded, done)) for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    loaded.wait()
+    stats = [smaps_rollup(proc.pid) for proc in procs]
+    done.wait()
+    for proc in procs:
+        proc.join()
+    return stats
+
+
+def main():
+    # Imported here so spawned workers import fraud_data only after their
+    # environment is set.
+    from synthetic import write_transactions
+
+    n_rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    path = write_transactions(n_rows, tempfile.gettempdir())
+    # Build the snapshot and the column store once, outside the measurement.
+    measure(path, MODES['private'], 1)
+    measure(path, MODES['mmap'], 1)
+
+    print(f"{n_rows:,} rows, {n_workers} workers (MiB per worker)")
+    print(f"{'mode':>8} {'rss':>9} {'pss':>9} {'uss':>9} {'total pss':>10}")
+    for mode, env in MODES.items():
+        stats = measure(path, env, n_workers)
+        mean = {key: sum(s[key] for s in stats) / len(stats) for key in ('rss', 'pss', 'uss')}
+        total_pss = sum(s['pss'] for s in stats)
+        print(f"{mode:>8} {mean['rss']:>9.1f} {mean['pss']:>9.1f} {mean['uss']:>9.1f} {total_pss:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Figure JSON size: px.histogram over raw rows vs the figures the apps serve.
+
+For every histogram-style chart, builds the ``px.histogram`` (or
+``go.Histogram``) figure the app used to send, with every row embedded,
+and the app's current figure (bars binned or counted on the server), and
+prints the JSON size of both.
+
+Usage: python benchmarks/report_figure_sizes.py [ROWS ...]
+       (default: the bundled dataset; ROWS resamples it synthetically)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from synthetic import parse_sizes, write_transactions
+
+from fraud_data import load_transactions
+from fraud_histogram import figure_size
+
+
+def first_figure(result):
+    return next(item for item in result if isinstance(item, go.Figure))
+
+
+def raw_kde_histogram(df):
+    df = df[df['amt'] <= 1500]
+    return go.Figure([
+        go.Histogram(x=df[df['is_fraud'] == label]['amt'], nbinsx=50, histnorm='probability density')
+        for label in (1, 0)
+    ])
+
+
+def served_figures():
+    import app_LogScaled_Distribution
+    import app_daily_analysis
+    import app_kde_density
+    import app_monthly_analysis
+    import app_monthly_dashboard
+    import app_realtime_monitoring
+    import app_weekday_analysis
+
+    yield 'app_LogScaled_Distribution', app_LogScaled_Distribution.fig, \
+        lambda df: px.histogram(df.assign(log_amt=np.log(df['amt'])), x='log_amt', color='is_fraud', nbins=50)
+    yield 'app_realtime_monitoring', app_realtime_monitoring.fig, \
+        lambda df: px.histogram(df, x='hour', color='is_fraud', barmode='group')
+    yield 'app_monthly_analysis', app_monthly_analysis.build_figure(), \
+        lambda df: px.histogram(df, x='month', color='is_fraud', barmode='group')
+    yield 'app_daily_analysis histogram', first_figure(app_daily_analysis.update_charts('histogram', 'blue_orange')), \
+        lambda df: px.histogram(df, x='day_of_week', color='is_fraud', barmode='group')
+    yield 'app_weekday_analysis histogram', first_figure(app_weekday_analysis.update_dashboard('histogram', ['all'])), \
+        lambda df: px.histogram(df, x='day_of_week', color='is_fraud', barmode='group')
+    yield 'app_monthly_dashboard bar_grouped', \
+        first_figure(app_monthly_dashboard.update_dashboard(None, None, 'bar_grouped')), \
+        lambda df: px.histogram(df, x='month', color='is_fraud', barmode='group')
+    yield 'app_kde_density hist', app_kde_density.update_plot(1500, 'hist', 200, [], 'linear'), raw_kde_histogram
+
+
+def report():
+    df = load_transactions()
+    print(f"{len(df):,} rows")
+    print(f"{'figure':<36} {'raw rows (KB)':>14} {'served (KB)':>12} {'ratio':>8}")
+    for name, served, raw in served_figures():
+        raw_size = figure_size(raw(df))
+        served_size = figure_size(served)
+        print(f"{name:<36} {raw_size / 1024:>14,.1f} {served_size / 1024:>12,.1f} {raw_size / served_size:>7.0f}x")
+
+
+def main():
+    if sys.argv[1:2] == ['--child']:
+        return report()
+    sizes = parse_sizes(sys.argv[1:], [])
+    if not sizes:
+        return report()
+    directory = tempfile.mkdtemp(prefix='fraud-bench-')
+    for n_rows in sizes:
+        env = dict(os.environ, FRAUD_DATA_FILE=write_transactions(n_rows, directory))
+        subprocess.run([sys.executable, __file__, '--child'], env=env, check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fraud_data import DATA_FILE
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+# The Kaggle export's trans_date_trans_time runs ~7 years ahead of unix_time.
+UNIX_TIME_OFFSET = 220838400
+
+
+def make_transactions(n_rows, seed=0):
+    """Resample the bundled CSV up to ``n_rows`` rows, jittering amounts and
+    spreading timestamps over a longer period so the output stays time-sorted
+    and Kaggle-shaped."""
+    base = pd.read_csv(DATA_FILE)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    df['amt'] = (df['amt'] * rng.uniform(0.9, 1.1, n_rows)).round(2)
+    start = pd.Timestamp(base['trans_date_trans_time'].iloc[0]).value // 10**9
+    offsets = np.sort(rng.integers(0, 2 * SECONDS_PER_YEAR, n_rows))
+    df['unix_time'] = start - UNIX_TIME_OFFSET + offsets
+    df['trans_date_trans_time'] = pd.to_datetime(start + offsets, unit='s').strftime('%Y-%m-%d %H:%M:%S')
+    return df
+
+
+def write_transactions(n_rows, directory, seed=0):
+    path = os.path.join(directory, 'transactions_%d.csv' % n_rows)
+    if not os.path.exists(path):
+        make_transactions(n_rows, seed).to_csv(path, index=False)
+    return path
+
+
+def parse_sizes(argv, default):
+    return [int(float(arg)) for arg in argv] or default
@@ -0,0 +1,45 @@
+"""Copy plotly.js's topojson base maps next to the dashboards.
+
+    python fetch_topojson.py [NAME ...]   (default: usa_110m)
+
+The geographic dashboard's maps draw land and state outlines from these
+files. Without a local copy the browser fetches them from the plotly CDN.
+Files are downloaded once from the ``topojsonURL`` default of the plotly.js
+bundled with the installed plotly package, so they match that release,
+and written to ``assets/topojson/``, which the app then serves itself.
+"""
+import os
+import re
+import sys
+import urllib.request
+
+import plotly
+
+TOPOJSON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'topojson')
+DEFAULT_NAMES = ['usa_110m']
+
+
+def bundled_topojson_url():
+    """Default ``topojsonURL`` of the plotly.js shipped with plotly."""
+    bundle = os.path.join(os.path.dirname(plotly.__file__), 'package_data', 'plotly.min.js')
+    with open(bundle, encoding='utf-8') as f:
+        match = re.search(r'topojsonURL:\{[^}]*dflt:"([^"]+)"', f.read())
+    if match is None:
+        raise RuntimeError('no topojsonURL default in %s' % bundle)
+    return match.group(1)
+
+
+def fetch_topojson(names=DEFAULT_NAMES, directory=TOPOJSON_DIR, base_url=None):
+    base_url = base_url or bundled_topojson_url()
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        target = os.path.join(directory, name + '.json')
+        tmp = '%s.%d.tmp' % (target, os.getpid())
+        with urllib.request.urlopen(base_url.rstrip('/') + '/' + name + '.json') as response, open(tmp, 'wb') as f:
+            f.write(response.read())
+        os.replace(tmp, target)
+        print(target)
+
+
+if __name__ == '__main__':
+    fetch_topojson(sys.argv[1:] or DEFAULT_NAMES)
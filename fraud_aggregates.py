@@ -0,0 +1,455 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import (CACHE_ENABLED, CSV_DTYPES, DATA_FILE, DAY_ORDER, MMAP_ENABLED, MONTH_ORDER,
+                        add_time_columns, apply_vocabularies, attach_column_store, iter_cache_chunks,
+                        loaded_transactions, open_cache, source_fingerprint)
+
+CHUNK_SIZE = 250_000
+
+DROP_DIRECTORY = os.environ.get('FRAUD_DROP_DIR')
+DROP_POLL_SECONDS = float(os.environ.get('FRAUD_DROP_POLL_SECONDS', '5'))
+REJECTED_DIRECTORY = 'rejected'
+
+INGEST_COLUMNS = ['trans_date_trans_time', 'category', 'amt', 'state', 'lat', 'long', 'is_fraud']
+# The same columns in a loaded frame, with the time columns derived.
+FRAME_COLUMNS = ['transaction_date', 'hour', 'day_of_week', 'month',
+                 'category', 'amt', 'state', 'lat', 'long', 'is_fraud']
+
+AMOUNT_BIN_EDGES = [0, 10, 25, 50, 100, 250, 500, 1000, 2500, np.inf]
+AMOUNT_BIN_LABELS = ['<$10', '$10-25', '$25-50', '$50-100', '$100-250',
+                     '$250-500', '$500-1k', '$1k-2.5k', '>$2.5k']
+
+DIMENSIONS = ['state', 'category', 'hour', 'day_of_week', 'month', 'amount_bin', ('week', 'day_of_week')]
+
+# Small-int time axes: (first code, labels).
+TIME_AXES = {
+    'hour': (0, list(range(24))),
+    'day_of_week': (0, DAY_ORDER),
+    'month': (1, MONTH_ORDER),
+}
+MATRICES = [('day_of_week', 'hour'), ('month', 'hour'), ('month', 'day_of_week')]
+
+logger = logging.getLogger(__name__)
+
+
+def add_amount_bin(df):
+    return df.assign(amount_bin=pd.cut(df['amt'], AMOUNT_BIN_EDGES, labels=AMOUNT_BIN_LABELS, right=False))
+
+
+def add_week(df):
+    # Monday of the transaction's week, i.e. the start of pandas' 'W' period.
+    days = df['transaction_date'].to_numpy().astype('datetime64[D]')
+    return df.assign(week=days - df['day_of_week'].to_numpy().astype('timedelta64[D]'))
+
+
+def week_label(week):
+    """Format a week start like ``str(pd.Period(..., 'W'))``."""
+    week = pd.Timestamp(week)
+    return '%s/%s' % (week.date(), (week + pd.Timedelta(days=6)).date())
+
+
+def measure_frame(df):
+    amt = df['amt'].to_numpy(dtype='float64')
+    return pd.DataFrame({
+        'count': np.ones(len(df), dtype='int64'),
+        'frauds': df['is_fraud'].to_numpy(dtype='int64'),
+        'amt_sum': amt,
+        'amt_sumsq': amt * amt,
+        'lat_sum': df['lat'].to_numpy(dtype='float64'),
+        'long_sum': df['long'].to_numpy(dtype='float64'),
+    }, index=df.index)
+
+
+def cell_keys(codes, shape):
+    """Row-major cell number of every combination of ``codes`` (one
+    small-int array per axis of ``shape``)."""
+    keys = np.zeros(len(codes[0]), dtype='intp')
+    for axis_codes, size in zip(codes, shape):
+        keys *= size
+        keys += axis_codes
+    return keys
+
+
+def code_matrix(codes, shape, weights=None):
+    """Dense array of ``shape`` counting every combination of ``codes``, or
+    summing ``weights`` over them, with a single ``np.bincount``."""
+    return np.bincount(cell_keys(codes, shape), weights, minlength=int(np.prod(shape))).reshape(shape)
+
+
+def _pad(values, shape):
+    if values.shape == shape:
+        return values
+    padded = np.zeros(shape)
+    padded[tuple(slice(0, size) for size in values.shape)] = values
+    return padded
+
+
+def summarize(sums):
+    """Turn per-group count/frauds/amt_sum/amt_sumsq (and optionally
+    lat_sum/long_sum) into totals, rates, means and sample standard deviations."""
+    count = sums['count']
+    mean = sums['amt_sum'] / count
+    variance = (sums['amt_sumsq'] - count * mean ** 2) / (count - 1)
+    table = pd.DataFrame({
+        'transactions': count,
+        'frauds': sums['frauds'],
+        'fraud_rate': sums['frauds'] / count * 100,
+        'total_amount': sums['amt_sum'],
+        'avg_amount': mean,
+        'amount_std': np.sqrt(variance.clip(lower=0)),
+    })
+    if 'lat_sum' in sums:
+        table['avg_lat'] = sums['lat_sum'] / count
+        table['avg_long'] = sums['long_sum'] / count
+    return table
+
+
+class Aggregator:
+    """Running count, fraud, amount and location sums grouped by one or more
+    columns, so means, rates and standard deviations can be derived without
+    keeping the rows.
+
+    Every key is coded on an append-only label index; categoricals of the
+    loaded frame already carry the shared vocabulary codes and are used as
+    is. The sums are dense arrays over the code space, so an update is one
+    ``np.bincount`` per measure.
+    """
+
+    def __init__(self, keys):
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.labels = dict.fromkeys(self.keys)
+        self.sums = {}
+
+    def _codes(self, key, series):
+        if key in TIME_AXES and series.dtype.kind in 'iu':
+            # Contiguous small-int axes: the value offset is the code.
+            first, labels = TIME_AXES[key]
+            if self.labels[key] is None:
+                self.labels[key] = pd.Index(np.arange(first, first + len(labels)), dtype=series.dtype)
+            return series.to_numpy().astype('intp') - first
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.array.codes
+            values = series.cat.categories
+            if series.cat.ordered:
+                # Day and month names and amount bins keep their order.
+                values = pd.CategoricalIndex(values, dtype=series.dtype)
+        else:
+            codes, values = pd.factorize(series.to_numpy())
+            values = pd.Index(values)
+        labels = self.labels[key]
+        if labels is None:
+            self.labels[key] = values
+            return codes
+        if len(values) <= len(labels) and labels[:len(values)].equals(values):
+            return codes
+        mapping = labels.get_indexer(values)
+        unseen = mapping < 0
+        if unseen.any():
+            self.labels[key] = labels.append(values[unseen])
+            mapping = self.labels[key].get_indexer(values)
+        return np.where(codes >= 0, mapping[codes], -1)
+
+    def _add(self, codes, weights):
+        valid = np.logical_and.reduce([axis_codes >= 0 for axis_codes in codes])
+        if valid.all():
+            valid = slice(None)
+        shape = tuple(len(self.labels[key]) for key in self.keys)
+        keys = cell_keys([axis_codes[valid] for axis_codes in codes], shape)
+        for name, values in weights.items():
+            part = np.bincount(keys, values[valid], minlength=int(np.prod(shape))).reshape(shape)
+            self.sums[name] = part if name not in self.sums else _pad(self.sums[name], shape) + part
+
+    def update(self, df, measures=None):
+        if measures is None:
+            measures = measure_frame(df)
+        codes = [self._codes(key, df[key]) for key in self.keys]
+        self._add(codes, {name: measures[name].to_numpy(dtype='float64') for name in measures.columns})
+        return self
+
+    def merge(self, other):
+        if not other.sums:
+            return self
+        present = np.flatnonzero(other.sums['count'])
+        other_codes = np.unravel_index(present, other.sums['count'].shape)
+        codes = [self._codes(key, pd.Series(other.labels[key][level]))
+                 for key, level in zip(self.keys, other_codes)]
+        self._add(codes, {name: values.ravel()[present] for name, values in other.sums.items()})
+        return self
+
+    def table(self):
+        """Return one row per group with totals, rates, means and sample std."""
+        present = np.flatnonzero(self.sums['count'])
+        codes = np.unravel_index(present, self.sums['count'].shape)
+        levels = [self.labels[key][level].rename(key) for key, level in zip(self.keys, codes)]
+        index = levels[0] if len(levels) == 1 else pd.MultiIndex.from_arrays(levels)
+        sums = pd.DataFrame({name: values.ravel()[present] for name, values in self.sums.items()}, index=index)
+        return summarize(sums.sort_index().astype({'count': 'int64', 'frauds': 'int64'}))
+
+
+class TimeMatrix:
+    """Transaction and fraud counts over two time axes (e.g. 7 x 24 weekday
+    by hour) kept as dense arrays and updated with ``np.bincount``."""
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+        self.shape = (len(TIME_AXES[rows][1]), len(TIME_AXES[columns][1]))
+        self.count = np.zeros(self.shape, dtype='int64')
+        self.frauds = np.zeros(self.shape, dtype='int64')
+
+    def update(self, df):
+        rows = df[self.rows].to_numpy() - TIME_AXES[self.rows][0]
+        columns = df[self.columns].to_numpy() - TIME_AXES[self.columns][0]
+        cells = code_matrix([rows, columns, df['is_fraud'].to_numpy()], self.shape + (2,))
+        self.count += cells.sum(axis=2)
+        self.frauds += cells[:, :, 1]
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.frauds += other.frauds
+        return self
+
+    def tables(self):
+        """Return ``count``, ``frauds`` and ``fraud_rate`` (%) frames labelled
+        with the axis labels; empty cells have a rate of 0."""
+        index = pd.Index(TIME_AXES[self.rows][1], name=self.rows)
+        columns = pd.Index(TIME_AXES[self.columns][1], name=self.columns)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(self.count > 0, self.frauds / self.count * 100, 0.0)
+        return {
+            'count': pd.DataFrame(self.count.copy(), index=index, columns=columns),
+            'frauds': pd.DataFrame(self.frauds.copy(), index=index, columns=columns),
+            'fraud_rate': pd.DataFrame(rate, index=index, columns=columns),
+        }
+
+
+class FraudAggregates:
+    """A set of Aggregators fed from the same transaction frames.
+
+    Updates only touch the rows of the incoming batch plus one row per group,
+    so appending new transactions costs O(batch), not O(history). ``version``
+    increases with every update and can key caches of derived tables.
+    """
+
+    def __init__(self, dimensions=DIMENSIONS, matrices=MATRICES):
+        self.dimensions = dimensions
+        self.matrix_axes = matrices
+        self.aggregators = {
+            keys if isinstance(keys, str) else tuple(keys): Aggregator(keys) for keys in dimensions
+        }
+        self.matrices = {tuple(axes): TimeMatrix(*axes) for axes in matrices}
+        self.rows = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def update(self, df):
+        """Fold a batch of transactions into every aggregate. The batch may be
+        raw CSV rows or a frame that already has the derived time columns."""
+        if 'transaction_date' not in df.columns:
+            df = add_time_columns(df)
+        if 'amount_bin' not in df.columns:
+            df = add_amount_bin(df)
+        if 'week' not in df.columns:
+            df = add_week(df)
+        measures = measure_frame(df)
+        with self.lock:
+            for aggregator in self.aggregators.values():
+                aggregator.update(df, measures)
+            for matrix in self.matrices.values():
+                matrix.update(df)
+            self.rows += len(df)
+            self.version += 1
+        return self
+
+    append = update
+
+    def append_csv(self, path, chunksize=CHUNK_SIZE):
+        for chunk in iter_chunks(path, chunksize):
+            self.update(chunk)
+        return self
+
+    def read_batch(self, path):
+        """Aggregate the CSV batch ``path`` into a new, empty FraudAggregates
+        of the same shape, leaving this one untouched."""
+        return FraudAggregates(self.dimensions, self.matrix_axes).append_csv(path)
+
+    def merge(self, batch):
+        """Fold another FraudAggregates in, under one lock and one version."""
+        with self.lock:
+            for keys, aggregator in self.aggregators.items():
+                aggregator.merge(batch.aggregators[keys])
+            for axes, matrix in self.matrices.items():
+                matrix.merge(batch.matrices[axes])
+            self.rows += batch.rows
+            self.version += 1
+        return self
+
+    def table(self, keys):
+        with self.lock:
+            return self.aggregators[keys if isinstance(keys, str) else tuple(keys)].table()
+
+    def matrix(self, rows, columns):
+        with self.lock:
+            return self.matrices[(rows, columns)].tables()
+
+
+class DropDirectoryWatcher(threading.Thread):
+    """Poll a directory and fold every new ``*.csv`` batch into its targets.
+
+    Producers should write batches under another name and rename them to
+    ``*.csv`` once complete, so half-written files are never picked up.
+    Each target (``FraudAggregates``, ``FraudCube``) reads a batch into an
+    empty copy of itself with ``read_batch(path)`` and takes it in with
+    ``merge(batch)``, so a file is applied whole or not at all. Files that
+    fail to read are logged and moved to ``rejected/``; nothing raises out
+    of ``poll()`` or the polling thread.
+    """
+
+    def __init__(self, directory, interval=DROP_POLL_SECONDS):
+        super().__init__(name='fraud-drop-watcher', daemon=True)
+        self.directory = directory
+        self.interval = interval
+        self.targets = []
+        self.seen = set()
+        self.ingested = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def add_target(self, target):
+        """Replay the batches ingested so far into ``target``, then keep it
+        up to date with every later one."""
+        with self.lock:
+            for path in self.ingested:
+                try:
+                    target.merge(target.read_batch(path))
+                except Exception:
+                    logger.exception('could not replay drop batch %s', path)
+            self.targets.append(target)
+        return target
+
+    def reject(self, path):
+        rejected = os.path.join(self.directory, REJECTED_DIRECTORY)
+        try:
+            os.makedirs(rejected, exist_ok=True)
+            os.replace(path, os.path.join(rejected, os.path.basename(path)))
+        except OSError:
+            logger.exception('could not move %s to %s', path, rejected)
+
+    def poll(self):
+        try:
+            names = sorted(os.listdir(self.directory))
+        except OSError:
+            logger.exception('could not list drop directory %s', self.directory)
+            return []
+        ingested = []
+        with self.lock:
+            for name in names:
+                if not name.endswith('.csv') or name in self.seen:
+                    continue
+                self.seen.add(name)
+                path = os.path.join(self.directory, name)
+                try:
+                    batches = [target.read_batch(path) for target in self.targets]
+                except Exception:
+                    logger.exception('rejected drop batch %s', path)
+                    self.reject(path)
+                    continue
+                for target, batch in zip(self.targets, batches):
+                    target.merge(batch)
+                self.ingested.append(path)
+                ingested.append(name)
+        return ingested
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('polling %s failed', self.directory)
+
+    def stop(self):
+        self.stopped.set()
+
+
+@lru_cache(maxsize=None)
+def drop_watcher(directory):
+    """Return the process-wide watcher of ``directory``, started on first use."""
+    watcher = DropDirectoryWatcher(directory)
+    watcher.start()
+    return watcher
+
+
+def watch_drop_directory(target, directory=DROP_DIRECTORY):
+    """Keep ``target`` fed with the batches dropped in ``directory`` (by
+    default ``FRAUD_DROP_DIR``, if set), ingesting the current ones now."""
+    if directory:
+        watcher = drop_watcher(directory)
+        watcher.add_target(target)
+        watcher.poll()
+    return target
+
+
+def iter_chunks(path=DATA_FILE, chunksize=CHUNK_SIZE, usecols=INGEST_COLUMNS):
+    """Yield typed frames of at most ``chunksize`` rows with time columns derived."""
+    dtype = {column: CSV_DTYPES[column] for column in usecols if column in CSV_DTYPES}
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        yield add_time_columns(chunk)
+
+
+def iter_frame_chunks(df, chunksize=CHUNK_SIZE):
+    """Yield consecutive row slices of ``df`` of at most ``chunksize`` rows."""
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def iter_transactions(path=DATA_FILE, chunksize=CHUNK_SIZE):
+    """Yield the transactions of ``path`` as frames of at most ``chunksize``
+    rows with the ingest columns and derived time columns, coded on the
+    shared vocabularies, without materializing the whole frame.
+
+    The frame of ``load_transactions(path)`` is sliced if this process
+    already holds it. Otherwise rows come from the memory-mapped column
+    store (with ``FRAUD_DATA_MMAP=1``) or the Feather snapshot while they
+    are current, else from the CSV in chunks; none of them is built here.
+    """
+    df = loaded_transactions(path)
+    if df is None:
+        fingerprint = source_fingerprint(path)
+        if MMAP_ENABLED:
+            df = attach_column_store(path, fingerprint)
+    if df is not None:
+        yield from iter_frame_chunks(df[FRAME_COLUMNS], chunksize)
+        return
+    reader = open_cache(path, fingerprint) if CACHE_ENABLED else None
+    if reader is not None:
+        yield from iter_cache_chunks(reader, FRAME_COLUMNS, chunksize)
+        return
+    for chunk in iter_chunks(path, chunksize):
+        yield apply_vocabularies(chunk, path)
+
+
+def ingest_transactions(path=DATA_FILE, dimensions=DIMENSIONS, chunksize=CHUNK_SIZE):
+    """Stream the transactions of ``path`` through FraudAggregates; peak
+    memory depends on ``chunksize`` and the number of groups, never on the
+    file size."""
+    aggregates = FraudAggregates(dimensions)
+    for chunk in iter_transactions(path, chunksize):
+        aggregates.update(chunk)
+    return aggregates
+
+
+@lru_cache(maxsize=None)
+def load_aggregates(path=DATA_FILE):
+    """Return the process-wide aggregates for ``path``, built once.
+
+    When ``FRAUD_DROP_DIR`` is set, batches dropped there are appended in the
+    background for the lifetime of the process.
+    """
+    return watch_drop_directory(ingest_transactions(path))
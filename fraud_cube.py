@@ -0,0 +1,195 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from fraud_aggregates import CHUNK_SIZE, iter_chunks, iter_transactions, summarize, watch_drop_directory
+from fraud_data import DATA_FILE, read_vocabularies
+
+DIMENSIONS = ['state', 'category', 'hour', 'day_of_week', 'month', 'is_fraud']
+
+FIXED_VOCABULARIES = {
+    'hour': np.arange(24),
+    'day_of_week': np.arange(7),
+    'month': np.arange(1, 13),
+    'is_fraud': np.arange(2),
+}
+
+MEASURES = ['count', 'amt_sum', 'amt_sumsq', 'lat_sum', 'long_sum']
+
+
+class FraudCube:
+    """Sparse cube of transactions over state x category x hour x weekday x
+    month x is_fraud.
+
+    Only non-empty cells are stored, as one small-int code array per
+    dimension plus one array per measure, so every query costs O(cells)
+    whatever the number of rows behind them. Seeded with the shared
+    vocabularies, state and category codes match those of the loaded frame.
+    """
+
+    def __init__(self, dimensions=DIMENSIONS, vocabularies=None):
+        self.dimensions = list(dimensions)
+        vocabularies = vocabularies or {}
+        self.vocabularies = {
+            dim: FIXED_VOCABULARIES[dim] if dim in FIXED_VOCABULARIES
+            else np.array(vocabularies.get(dim, []), dtype=object)
+            for dim in self.dimensions
+        }
+        self.codes = {dim: np.zeros(0, dtype='int32') for dim in self.dimensions}
+        self.measures = {name: np.zeros(0) for name in MEASURES}
+        self.rows = 0
+        self.version = 0
+        self.lock = threading.Lock()
+
+    @property
+    def shape(self):
+        return tuple(len(self.vocabularies[dim]) for dim in self.dimensions)
+
+    def __len__(self):
+        return len(self.measures['count'])
+
+    def _encode(self, dim, series):
+        if dim in FIXED_VOCABULARIES:
+            # Fixed vocabularies are contiguous integer ranges.
+            codes = series.to_numpy().astype('int32') - self.vocabularies[dim][0]
+            if len(codes) and (codes.min() < 0 or codes.max() >= len(self.vocabularies[dim])):
+                raise ValueError('%s values out of range' % dim)
+            return codes
+        vocabulary = pd.Index(self.vocabularies[dim])
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Map the batch's (small) vocabulary instead of every row.
+            labels = series.cat.categories
+            codes = series.array.codes
+        else:
+            codes, labels = pd.factorize(series.to_numpy())
+        mapping = vocabulary.get_indexer(labels)
+        unseen = mapping < 0
+        if unseen.any():
+            new_labels = pd.Index(labels[unseen]).unique()
+            self.vocabularies[dim] = np.concatenate([self.vocabularies[dim], np.asarray(new_labels, dtype=object)])
+            mapping = pd.Index(self.vocabularies[dim]).get_indexer(labels)
+        # Missing labels keep the -1 code; update() drops those rows.
+        return np.where(codes >= 0, mapping[codes], -1).astype('int32')
+
+    def _fold(self, batch_codes, batch_measures, rows):
+        codes = {dim: np.concatenate([self.codes[dim], batch_codes[dim]]) for dim in self.dimensions}
+        keys = np.ravel_multi_index([codes[dim] for dim in self.dimensions], self.shape)
+        cells, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        self.codes = {dim: codes[dim][first] for dim in self.dimensions}
+        self.measures = {
+            name: np.bincount(inverse, np.concatenate([self.measures[name], batch_measures[name]]),
+                              minlength=len(cells))
+            for name in MEASURES
+        }
+        self.rows += rows
+        self.version += 1
+
+    def update(self, df):
+        """Fold a batch of transactions into the cube in O(batch + cells).
+        Rows with a missing label in any dimension are left out, as the
+        aggregates leave them out of that dimension's groups."""
+        with self.lock:
+            batch_codes = {dim: self._encode(dim, df[dim]) for dim in self.dimensions}
+            amt = df['amt'].to_numpy(dtype='float64')
+            batch_measures = {
+                'count': np.ones(len(df)),
+                'amt_sum': amt,
+                'amt_sumsq': amt * amt,
+                'lat_sum': df['lat'].to_numpy(dtype='float64'),
+                'long_sum': df['long'].to_numpy(dtype='float64'),
+            }
+            valid = np.logical_and.reduce([codes >= 0 for codes in batch_codes.values()])
+            if not valid.all():
+                batch_codes = {dim: codes[valid] for dim, codes in batch_codes.items()}
+                batch_measures = {name: values[valid] for name, values in batch_measures.items()}
+            self._fold(batch_codes, batch_measures, int(valid.sum()))
+        return self
+
+    def read_batch(self, path):
+        """Build the cells of the CSV batch ``path`` in a new cube seeded with
+        this cube's vocabularies, leaving this one untouched."""
+        with self.lock:
+            vocabularies = {dim: list(labels) for dim, labels in self.vocabularies.items()}
+        batch = FraudCube(self.dimensions, vocabularies)
+        for chunk in iter_chunks(path):
+            batch.update(chunk)
+        return batch
+
+    def merge(self, batch):
+        """Fold the cells of another cube in, under one lock and one version."""
+        with self.lock:
+            batch_codes = {}
+            for dim in self.dimensions:
+                codes = batch.codes[dim]
+                if dim not in FIXED_VOCABULARIES:
+                    codes = self._encode(dim, pd.Series(pd.Categorical.from_codes(
+                        codes, categories=pd.Index(batch.vocabularies[dim], dtype=object))))
+                batch_codes[dim] = codes
+            self._fold(batch_codes, batch.measures, batch.rows)
+        return self
+
+    def _mask(self, where):
+        mask = np.ones(len(self), dtype=bool)
+        for dim, labels in (where or {}).items():
+            if labels is None:
+                continue
+            if np.isscalar(labels):
+                labels = [labels]
+            wanted = pd.Index(self.vocabularies[dim]).get_indexer(list(labels))
+            mask &= np.isin(self.codes[dim], wanted[wanted >= 0])
+        return mask
+
+    def rollup(self, *by, where=None):
+        """Sum the measures over every dimension not in ``by`` for the cells
+        matching ``where`` ({dimension: label or list of labels}).
+
+        Returns one row per non-empty group, sorted by label, with the cube
+        measures plus ``frauds``.
+        """
+        with self.lock:
+            mask = self._mask(where)
+            shape = tuple(len(self.vocabularies[dim]) for dim in by)
+            if by:
+                keys = np.ravel_multi_index([self.codes[dim][mask] for dim in by], shape)
+            else:
+                keys = np.zeros(mask.sum(), dtype='int64')
+            size = int(np.prod(shape))
+            fraud = self.vocabularies['is_fraud'][self.codes['is_fraud'][mask]]
+            sums = {name: np.bincount(keys, self.measures[name][mask], minlength=size) for name in MEASURES}
+            sums['frauds'] = np.bincount(keys, self.measures['count'][mask] * fraud, minlength=size)
+            present = np.flatnonzero(sums['count'])
+            index_codes = np.unravel_index(present, shape) if by else ()
+            levels = [pd.Index(np.asarray(self.vocabularies[dim])[level], name=dim)
+                      for dim, level in zip(by, index_codes)]
+        if len(levels) == 1:
+            index = levels[0]
+        elif levels:
+            index = pd.MultiIndex.from_arrays(levels)
+        else:
+            index = pd.RangeIndex(len(present))
+        table = pd.DataFrame({name: values[present] for name, values in sums.items()}, index=index)
+        return table.astype({'count': 'int64', 'frauds': 'int64'}).sort_index()
+
+    def stats(self, *by, where=None):
+        """Rollup summarized as transactions, frauds, fraud_rate (%), total and
+        average amount, sample amount std and mean coordinates."""
+        return summarize(self.rollup(*by, where=where))
+
+
+def build_cube(path=DATA_FILE, chunksize=CHUNK_SIZE):
+    """Stream the transactions of ``path`` into a FraudCube with bounded
+    memory. Chunks are coded on the shared vocabularies, so state and
+    category codes map one to one."""
+    cube = FraudCube(vocabularies=read_vocabularies(path))
+    for chunk in iter_transactions(path, chunksize):
+        cube.update(chunk)
+    return cube
+
+
+@lru_cache(maxsize=None)
+def load_cube(path=DATA_FILE):
+    """Return the process-wide cube for ``path``, built once and, when
+    ``FRAUD_DROP_DIR`` is set, fed the batches dropped there."""
+    return watch_drop_directory(build_cube(path))
@@ -0,0 +1,485 @@
+import hashlib
+import json
+import os
+import shutil
+import warnings
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DATA_FILE = os.environ.get(
+    'FRAUD_DATA_FILE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eda_fraud_balanced_sorted.csv')
+)
+
+CATEGORICAL_COLUMNS = ['merchant', 'category', 'gender', 'city', 'state', 'job']
+
+CSV_DTYPES = {
+    'cc_num': 'int64',
+    'merchant': 'category',
+    'category': 'category',
+    'amt': 'float64',
+    'gender': 'category',
+    'city': 'category',
+    'state': 'category',
+    'lat': 'float32',
+    'long': 'float32',
+    'city_pop': 'int32',
+    'job': 'category',
+    'unix_time': 'int64',
+    'merch_lat': 'float32',
+    'merch_long': 'float32',
+    'is_fraud': 'int8',
+}
+
+CACHE_ENABLED = os.environ.get('FRAUD_DATA_CACHE', '1') != '0'
+MMAP_ENABLED = os.environ.get('FRAUD_DATA_MMAP', '0') == '1'
+VALIDATE_TIMES = os.environ.get('FRAUD_DATA_VALIDATE', '0') == '1'
+CACHE_SUFFIX = '.feather'
+STORE_SUFFIX = '.columns'
+VOCABULARY_SUFFIX = '.vocab.json'
+LOCK_SUFFIX = '.lock'
+CACHE_FORMAT_VERSION = 3
+CACHE_METADATA_KEY = b'fraud_data.source'
+FINGERPRINT_BLOCK_SIZE = 1 << 20
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SECONDS_PER_DAY = 86400
+
+# Frames returned by load_transactions in this process, by path.
+_loaded = {}
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June',
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+
+def read_transactions(path=DATA_FILE):
+    """Parse the transactions CSV with compact dtypes and derived time columns.
+
+    ``amt`` stays float64 because dashboards report sums and means of it;
+    coordinates are stored as float32, which keeps ~1 m precision. The raw
+    ``trans_date_trans_time`` string is replaced by ``transaction_date``.
+    """
+    df = pd.read_csv(path, dtype=CSV_DTYPES)
+    return apply_vocabularies(add_time_columns(df), path)
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on ``path + '.lock'`` shared by every process
+    on the host; a no-op where ``fcntl`` is not available or the lock file
+    cannot be created (e.g. a read-only data directory, where the writes it
+    guards fail and fall back quietly as well)."""
+    try:
+        f = open(path + LOCK_SUFFIX, 'a') if fcntl is not None else None
+    except OSError:
+        f = None
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def vocabulary_path(path):
+    return path + VOCABULARY_SUFFIX
+
+
+def read_vocabularies(path=DATA_FILE):
+    """Return the shared label vocabularies of ``path`` ({column: [labels]}),
+    or an empty dict if none were written yet."""
+    try:
+        with open(vocabulary_path(path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_vocabularies(path, vocabularies):
+    """Replace the vocabulary file of ``path``; callers hold its lock and
+    extend what is on disk, see ``apply_vocabularies``."""
+    target = vocabulary_path(path)
+    tmp = '%s.%d.tmp' % (target, os.getpid())
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(vocabularies, f)
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def encode_categoricals(df, vocabularies):
+    """Recode the categorical columns of ``df`` onto ``vocabularies``.
+
+    Vocabularies are append-only: labels not seen before are added at the
+    end in sorted order, so a code never changes meaning once assigned and
+    codes from any frame, chunk or cube built on the same vocabularies are
+    interchangeable. Returns the recoded frame and whether any vocabulary
+    grew; ``vocabularies`` is updated in place.
+    """
+    grown = False
+    columns = {}
+    for name in CATEGORICAL_COLUMNS:
+        if name not in df.columns:
+            continue
+        series = df[name]
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        known = vocabularies.get(name, [])
+        labels = series.cat.categories
+        if labels.tolist() == known[:len(labels)]:
+            # Already coded on (a prefix of) the shared vocabulary.
+            if series is not df[name]:
+                columns[name] = series
+            continue
+        unseen = labels[~labels.isin(known)]
+        if len(unseen):
+            vocabularies[name] = known + sorted(unseen.tolist())
+            grown = True
+        columns[name] = series.cat.set_categories(vocabularies[name])
+    return df.assign(**columns), grown
+
+
+def apply_vocabularies(df, path=DATA_FILE):
+    """Encode ``df`` with the vocabularies persisted next to ``path``,
+    extending the file when new labels appear.
+
+    Growing the file happens under a lock shared by every process: the
+    vocabularies are read again and ``df`` is re-encoded against them, so
+    labels another worker appended in the meantime keep their codes.
+    """
+    df, grown = encode_categoricals(df, read_vocabularies(path))
+    if grown:
+        with file_lock(vocabulary_path(path)):
+            vocabularies = read_vocabularies(path)
+            df, grown = encode_categoricals(df, vocabularies)
+            if grown:
+                write_vocabularies(path, vocabularies)
+    return df
+
+
+def parse_timestamps(values):
+    """Parse ``YYYY-MM-DD HH:MM:SS`` strings to datetime64[s].
+
+    NumPy parses the fixed ISO layout in one vectorized pass, without the
+    per-element format inference of a bare ``pd.to_datetime``.
+    """
+    values = np.asarray(values)
+    try:
+        return values.astype('datetime64[s]')
+    except ValueError:
+        # NumPy rejects the whole batch; let pandas name the offending value.
+        return pd.to_datetime(values, format=TIMESTAMP_FORMAT).to_numpy('datetime64[s]')
+
+
+def time_parts(transaction_date):
+    """Return hour, day of week (Monday=0) and month (1-12) as int8 arrays,
+    computed from epoch seconds by integer arithmetic."""
+    seconds = np.asarray(transaction_date, dtype='datetime64[s]').astype('int64')
+    days = seconds // SECONDS_PER_DAY
+    hour = (seconds - days * SECONDS_PER_DAY) // 3600
+    # 1970-01-01 was a Thursday.
+    day_of_week = (days + 3) % 7
+    month = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64') % 12 + 1
+    return hour.astype('int8'), day_of_week.astype('int8'), month.astype('int8')
+
+
+def check_time_columns(raw, df):
+    """Cross-check the derived time columns of ``df`` against an independent
+    pandas parse of the raw ``trans_date_trans_time`` strings and, when
+    present, against ``unix_time``.
+
+    Returns a report with the number of mismatching rows per check and the
+    distinct ``unix_time - timestamp`` offsets (in seconds) with their counts.
+    """
+    reference = pd.to_datetime(raw['trans_date_trans_time'], format=TIMESTAMP_FORMAT)
+    report = {
+        'rows': len(df),
+        'transaction_date': int((reference.to_numpy('datetime64[s]') != df['transaction_date'].to_numpy()).sum()),
+        'hour': int((reference.dt.hour.to_numpy() != df['hour'].to_numpy()).sum()),
+        'day_of_week': int((reference.dt.dayofweek.to_numpy() != df['day_of_week'].to_numpy()).sum()),
+        'month': int((reference.dt.month.to_numpy() != df['month'].to_numpy()).sum()),
+    }
+    if 'unix_time' in raw.columns:
+        seconds = df['transaction_date'].to_numpy().astype('int64')
+        offsets = pd.Series(raw['unix_time'].to_numpy() - seconds).value_counts()
+        report['unix_time_offsets'] = {int(offset): int(count) for offset, count in offsets.items()}
+    return report
+
+
+def validate_time_columns(raw, df):
+    """Raise if the fast parse disagrees with pandas; warn if ``unix_time``
+    is not a constant shift of the parsed timestamps."""
+    report = check_time_columns(raw, df)
+    mismatches = {key: report[key] for key in ('transaction_date', 'hour', 'day_of_week', 'month') if report[key]}
+    if mismatches:
+        raise ValueError('time columns disagree with pandas parsing: %s' % mismatches)
+    if len(report.get('unix_time_offsets', {})) > 1:
+        warnings.warn('unix_time is not a constant offset of trans_date_trans_time: %s'
+                      % report['unix_time_offsets'])
+    return report
+
+
+def add_time_columns(df):
+    transaction_date = parse_timestamps(df['trans_date_trans_time'])
+    hour, day_of_week, month = time_parts(transaction_date)
+    derived = df.assign(
+        transaction_date=transaction_date,
+        hour=hour,
+        day_of_week=day_of_week,
+        month=month,
+        day_name=pd.Categorical.from_codes(day_of_week, categories=DAY_ORDER, ordered=True),
+        month_name=pd.Categorical.from_codes(month - 1, categories=MONTH_ORDER, ordered=True),
+    )
+    if VALIDATE_TIMES:
+        validate_time_columns(df, derived)
+    return derived.drop(columns='trans_date_trans_time')
+
+
+def source_fingerprint(path):
+    """Identify a CSV by size, mtime and a hash of its first and last blocks.
+
+    Hashing only the edges keeps the check constant-time on multi-GB exports
+    while still catching in-place rewrites that preserve size and mtime.
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+        if stat.st_size > FINGERPRINT_BLOCK_SIZE:
+            f.seek(-min(FINGERPRINT_BLOCK_SIZE, stat.st_size - FINGERPRINT_BLOCK_SIZE), os.SEEK_END)
+            digest.update(f.read())
+    return {
+        'version': CACHE_FORMAT_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': digest.hexdigest(),
+    }
+
+
+def cache_path(path):
+    return path + CACHE_SUFFIX
+
+
+def open_cache(path, fingerprint):
+    """Return an Arrow IPC reader over the memory-mapped Feather snapshot of
+    ``path``, or None if it is missing or stale. Record batches are only
+    read when asked for."""
+    snapshot = cache_path(path)
+    if pa is None or not os.path.exists(snapshot):
+        return None
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(snapshot))
+    except (OSError, pa.ArrowInvalid):
+        return None
+    stored = (reader.schema.metadata or {}).get(CACHE_METADATA_KEY)
+    if stored is None or json.loads(stored) != fingerprint:
+        return None
+    return reader
+
+
+def read_cache(path, fingerprint):
+    """Return the cached frame for ``path``, or None if it is missing or stale."""
+    reader = open_cache(path, fingerprint)
+    return None if reader is None else reader.read_all().to_pandas()
+
+
+def iter_cache_chunks(reader, columns, chunksize):
+    """Yield frames of at most ``chunksize`` rows of ``columns`` from an
+    ``open_cache`` reader, converting one slice of record batches at a time."""
+    pending = []
+    rows = 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i).select(columns)
+        pending.append(batch)
+        rows += batch.num_rows
+        while rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize).to_pandas()
+            rest = table.slice(chunksize)
+            pending = rest.to_batches()
+            rows = rest.num_rows
+    if rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+def write_cache(path, df, fingerprint):
+    if pa is None:
+        return
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[CACHE_METADATA_KEY] = json.dumps(fingerprint).encode()
+    table = table.replace_schema_metadata(metadata)
+    snapshot = cache_path(path)
+    tmp = '%s.%d.tmp' % (snapshot, os.getpid())
+    try:
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, snapshot)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_transactions_cached(path=DATA_FILE):
+    """Load transactions from the Feather snapshot next to the CSV when it is
+    still valid, otherwise parse the CSV and refresh the snapshot.
+
+    Falls back to plain CSV parsing when pyarrow is not installed.
+    """
+    fingerprint = source_fingerprint(path)
+    df = read_cache(path, fingerprint)
+    if df is None:
+        df = read_transactions(path)
+        write_cache(path, df, fingerprint)
+    return df
+
+
+def store_path(path):
+    return path + STORE_SUFFIX
+
+
+def read_manifest(store):
+    try:
+        with open(os.path.join(store, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_column_store(path, df, fingerprint):
+    """Write every column of ``df`` as a raw ``.npy`` file plus a manifest.
+
+    Categoricals are stored as their integer codes and datetimes as int64, so
+    each file can later be memory-mapped without decoding.
+    """
+    store = store_path(path)
+    tmp = '%s.%d.tmp' % (store, os.getpid())
+    try:
+        os.makedirs(tmp)
+        columns = []
+        for name in df.columns:
+            series = df[name]
+            entry = {'name': name, 'dtype': str(series.dtype)}
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = series.array.codes
+                entry['categories'] = series.cat.categories.tolist()
+                entry['ordered'] = bool(series.cat.ordered)
+            else:
+                values = series.to_numpy()
+                if values.dtype == object:
+                    continue
+            np.save(os.path.join(tmp, name + '.npy'), values)
+            columns.append(entry)
+        with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+            json.dump({'source': fingerprint, 'columns': columns}, f)
+    except OSError:
+        # Read-only or full disk: the caller serves the parsed frame.
+        shutil.rmtree(tmp, ignore_errors=True)
+        return
+    publish_column_store(tmp, store, fingerprint)
+
+
+def publish_column_store(tmp, store, fingerprint):
+    """Move the finished store ``tmp`` into place.
+
+    Under the store lock, a store for the same source that another worker
+    published first wins and ``tmp`` is dropped; a stale store is renamed
+    aside before ``tmp`` is renamed in, so the live path never points at a
+    half-deleted directory. Only the renamed-aside copy is removed.
+    """
+    stale = '%s.%d.stale' % (store, os.getpid())
+    with file_lock(store):
+        manifest = read_manifest(store)
+        if manifest is not None and manifest['source'] == fingerprint:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        try:
+            if os.path.exists(store):
+                os.rename(store, stale)
+            os.rename(tmp, store)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+    shutil.rmtree(stale, ignore_errors=True)
+
+
+def attach_column_store(path, fingerprint):
+    """Return a frame backed by read-only memory maps of the column store,
+    or None if the store is missing or stale.
+
+    Pages are shared through the OS page cache, so every worker attached to
+    the same store adds almost nothing to its private memory.
+    """
+    store = store_path(path)
+    manifest = read_manifest(store)
+    if manifest is None or manifest['source'] != fingerprint:
+        return None
+    data = {}
+    for entry in manifest['columns']:
+        try:
+            values = np.asarray(np.load(os.path.join(store, entry['name'] + '.npy'), mmap_mode='r'))
+        except (OSError, ValueError):
+            # Replaced by a newer store while attaching.
+            return None
+        if 'categories' in entry:
+            dtype = pd.CategoricalDtype(entry['categories'], ordered=entry['ordered'])
+            data[entry['name']] = pd.Categorical.from_codes(values, dtype=dtype)
+        else:
+            data[entry['name']] = values.view(entry['dtype'])
+    return pd.DataFrame(data, copy=False)
+
+
+def read_transactions_mmap(path=DATA_FILE):
+    """Load transactions from the memory-mapped column store next to the CSV,
+    building it first if it is missing or stale."""
+    fingerprint = source_fingerprint(path)
+    df = attach_column_store(path, fingerprint)
+    if df is None:
+        parsed = read_transactions_cached(path)
+        write_column_store(path, parsed, fingerprint)
+        df = attach_column_store(path, fingerprint)
+        if df is None:
+            df = parsed
+    return df
+
+
+@lru_cache(maxsize=None)
+def load_transactions(path=DATA_FILE):
+    """Return the process-wide transactions frame, parsing the CSV only once.
+
+    Every dashboard receives the same object, so callers must treat it as
+    read-only and derive their own columns with ``assign``. Categorical
+    columns are coded on the shared vocabularies of ``path``.
+    """
+    if MMAP_ENABLED:
+        df = read_transactions_mmap(path)
+    elif CACHE_ENABLED:
+        df = read_transactions_cached(path)
+    else:
+        df = read_transactions(path)
+    df = _loaded[path] = apply_vocabularies(df, path)
+    return df
+
+
+def loaded_transactions(path=DATA_FILE):
+    """Return the frame ``load_transactions(path)`` already holds in this
+    process, or None without loading anything."""
+    return _loaded.get(path)
@@ -0,0 +1,243 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import DATA_FILE, load_transactions
+
+# (min long, max long, min lat, max lat) around the 50 states.
+US_BOUNDS = (-168.0, -66.0, 18.0, 68.0)
+RASTER_WIDTH = 204
+RASTER_HEIGHT = 100
+
+GRID_SHAPE = os.environ.get('FRAUD_GEO_GRID', 'hex')
+GRID_CELL_SIZE = float(os.environ.get('FRAUD_GEO_CELL_SIZE', '0.5'))
+SPATIAL_CELL_SIZE = 1.0
+
+LOCATION_COLUMNS = {'cardholder': ('lat', 'long'), 'merchant': ('merch_lat', 'merch_long')}
+
+
+def pixel_numbers(lat, long, bounds, width, height):
+    """Row-major pixel of every point on a ``width`` x ``height`` grid over
+    ``bounds``; points outside go to the nearest edge pixel."""
+    lon_min, lon_max, lat_min, lat_max = bounds
+    columns = (np.asarray(long, dtype='float64') - lon_min) / (lon_max - lon_min) * width
+    rows = (np.asarray(lat, dtype='float64') - lat_min) / (lat_max - lat_min) * height
+    return (np.clip(np.floor(rows), 0, height - 1).astype('int64') * width
+            + np.clip(np.floor(columns), 0, width - 1).astype('int64'))
+
+
+def pixel_centers(bounds, width, height):
+    lon_min, lon_max, lat_min, lat_max = bounds
+    return (lon_min + (np.arange(width) + 0.5) * (lon_max - lon_min) / width,
+            lat_min + (np.arange(height) + 0.5) * (lat_max - lat_min) / height)
+
+
+def raster_counts(lat, long, is_fraud, bounds, width=RASTER_WIDTH, height=RASTER_HEIGHT):
+    """(height, width) transaction and fraud counts per pixel of ``bounds``."""
+    pixels = pixel_numbers(lat, long, bounds, width, height)
+    count = np.bincount(pixels, minlength=width * height).reshape(height, width)
+    frauds = np.bincount(pixels, np.asarray(is_fraud, dtype='float64'), minlength=width * height)
+    return count, frauds.reshape(height, width).astype('int64')
+
+
+class GeoRaster:
+    """Transactions binned once into a long x lat pixel grid.
+
+    Rows are kept sorted by amount with their pixel number, so the count
+    and fraud rasters for any amount range are two binary searches and a
+    ``np.bincount`` over the matching slice; the raster itself has a fixed
+    size whatever the number of transactions.
+    """
+
+    def __init__(self, lat, long, amt, is_fraud, width=RASTER_WIDTH, height=RASTER_HEIGHT, bounds=US_BOUNDS):
+        self.width, self.height = width, height
+        self.x, self.y = pixel_centers(bounds, width, height)
+
+        amt = np.asarray(amt, dtype='float64')
+        order = np.argsort(amt, kind='stable')
+        self.amt = amt[order]
+        self.pixels = pixel_numbers(lat, long, bounds, width, height)[order].astype('int32')
+        self.is_fraud = np.asarray(is_fraud, dtype='float64')[order]
+
+    def query(self, low=-np.inf, high=np.inf):
+        """(height, width) transaction and fraud counts per pixel over rows
+        with ``low <= amt <= high``."""
+        lo = np.searchsorted(self.amt, low, 'left')
+        hi = np.searchsorted(self.amt, high, 'right')
+        size = self.width * self.height
+        pixels = self.pixels[lo:hi]
+        count = np.bincount(pixels, minlength=size).reshape(self.height, self.width)
+        frauds = np.bincount(pixels, self.is_fraud[lo:hi], minlength=size).reshape(self.height, self.width)
+        return count, frauds.astype('int64')
+
+
+def square_cells(lat, long, cell_size, bounds=US_BOUNDS):
+    """Cell number of every point on a square grid of ``cell_size`` degrees,
+    with the long/lat centers of all cells."""
+    lon_min, lon_max, lat_min, lat_max = bounds
+    width = int(np.ceil((lon_max - lon_min) / cell_size))
+    height = int(np.ceil((lat_max - lat_min) / cell_size))
+    i = np.clip(((long - lon_min) / cell_size).astype('int64'), 0, width - 1)
+    j = np.clip(((lat - lat_min) / cell_size).astype('int64'), 0, height - 1)
+    centers_i, centers_j = np.meshgrid(np.arange(width), np.arange(height))
+    centers = (lon_min + (centers_i.ravel() + 0.5) * cell_size,
+               lat_min + (centers_j.ravel() + 0.5) * cell_size)
+    return j * width + i, centers
+
+
+def hex_cells(lat, long, cell_size, bounds=US_BOUNDS):
+    """Cell number of every point on a pointy-top hexagonal grid whose
+    centers are ``cell_size`` degrees apart along a row, with the long/lat
+    centers of all cells. Like matplotlib's hexbin, the grid is two offset
+    rectangular lattices and each point goes to the nearer center."""
+    lon_min, lon_max, lat_min, lat_max = bounds
+    row_height = cell_size * np.sqrt(3)
+    width = int(np.ceil((lon_max - lon_min) / cell_size)) + 1
+    height = int(np.ceil((lat_max - lat_min) / row_height)) + 1
+    x = (long - lon_min) / cell_size
+    y = (lat - lat_min) / row_height
+    i1, j1 = np.round(x), np.round(y)
+    i2, j2 = np.floor(x), np.floor(y)
+    first = (x - i1) ** 2 + 3 * (y - j1) ** 2 < (x - i2 - 0.5) ** 2 + 3 * (y - j2 - 0.5) ** 2
+    i = np.clip(np.where(first, i1, i2), 0, width - 1).astype('int64')
+    j = np.clip(np.where(first, j1, j2), 0, height - 1).astype('int64')
+    centers_i, centers_j = np.meshgrid(np.arange(width), np.arange(height))
+    offsets = np.array([0.0, 0.5])
+    centers = (lon_min + (np.concatenate([centers_i.ravel()] * 2) + offsets.repeat(width * height)) * cell_size,
+               lat_min + (np.concatenate([centers_j.ravel()] * 2) + offsets.repeat(width * height)) * row_height)
+    return np.where(first, 0, width * height) + j * width + i, centers
+
+
+GRID_CELLS = {'square': square_cells, 'hex': hex_cells}
+
+# Unit corner offsets of a cell, clockwise from the top as d3-geo expects
+# of an exterior ring. A hex cell is the pointy-top hexagon whose flat
+# sides are ``cell_size`` apart, which is exactly the set of points
+# hex_cells assigns to its center.
+CELL_CORNERS = {
+    'square': np.array([[-0.5, 0.5], [0.5, 0.5], [0.5, -0.5], [-0.5, -0.5]]),
+    'hex': np.column_stack([np.cos(np.radians([90, 30, -30, -90, -150, 150])),
+                            np.sin(np.radians([90, 30, -30, -90, -150, 150]))]) / np.sqrt(3),
+}
+
+
+class GeoGrid:
+    """Transactions assigned once to square or hexagonal lat/long cells.
+
+    Like ``GeoRaster``, rows are sorted by amount, so the per-cell count,
+    fraud and amount sums for an amount range are a ``np.bincount`` over
+    one slice, and only cells with transactions are returned.
+    """
+
+    def __init__(self, lat, long, amt, is_fraud, cell_size=GRID_CELL_SIZE, shape=GRID_SHAPE, bounds=US_BOUNDS):
+        if shape not in GRID_CELLS:
+            raise ValueError('shape must be one of %s' % ', '.join(GRID_CELLS))
+        self.cell_size = cell_size
+        self.shape = shape
+        cells, (self.long, self.lat) = GRID_CELLS[shape](
+            np.asarray(lat, dtype='float64'), np.asarray(long, dtype='float64'), cell_size, bounds)
+        amt = np.asarray(amt, dtype='float64')
+        order = np.argsort(amt, kind='stable')
+        self.amt = amt[order]
+        self.cells = cells[order].astype('int32')
+        self.is_fraud = np.asarray(is_fraud, dtype='float64')[order]
+
+    def geojson(self, cells, precision=3):
+        """GeoJSON FeatureCollection with the polygon of every cell number in
+        ``cells``, each feature's ``id`` being the cell number as a string."""
+        cells = np.asarray(cells)
+        corners = CELL_CORNERS[self.shape] * self.cell_size
+        long = np.round(self.long[cells, None] + corners[:, 0], precision)
+        lat = np.round(self.lat[cells, None] + corners[:, 1], precision)
+        features = []
+        for cell, ring_long, ring_lat in zip(cells.tolist(), long.tolist(), lat.tolist()):
+            ring = [list(point) for point in zip(ring_long, ring_lat)]
+            features.append({'type': 'Feature', 'id': str(cell),
+                             'geometry': {'type': 'Polygon', 'coordinates': [ring + ring[:1]]}})
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def query(self, low=-np.inf, high=np.inf):
+        """Cell number, center long/lat, count, frauds and amt_sum of every
+        cell with transactions in ``low <= amt <= high``."""
+        lo = np.searchsorted(self.amt, low, 'left')
+        hi = np.searchsorted(self.amt, high, 'right')
+        cells = self.cells[lo:hi]
+        size = len(self.long)
+        count = np.bincount(cells, minlength=size)
+        present = np.flatnonzero(count)
+        return pd.DataFrame({
+            'cell': present,
+            'long': self.long[present],
+            'lat': self.lat[present],
+            'count': count[present],
+            'frauds': np.bincount(cells, self.is_fraud[lo:hi], minlength=size)[present].astype('int64'),
+            'amt_sum': np.bincount(cells, self.amt[lo:hi], minlength=size)[present],
+        })
+
+
+class SpatialIndex:
+    """Points bucketed by a square lat/long grid for bounding-box queries.
+
+    Rows are sorted by cell, so the cells of one grid row that overlap a box
+    form a single contiguous slice; a query gathers one slice per grid row
+    and only tests the points of those cells against the box.
+    """
+
+    def __init__(self, lat, long, cell_size=SPATIAL_CELL_SIZE, bounds=US_BOUNDS):
+        self.bounds = bounds
+        self.cell_size = cell_size
+        lon_min, lon_max, lat_min, lat_max = bounds
+        self.width = int(np.ceil((lon_max - lon_min) / cell_size))
+        self.height = int(np.ceil((lat_max - lat_min) / cell_size))
+        lat = np.asarray(lat, dtype='float64')
+        long = np.asarray(long, dtype='float64')
+        cells = pixel_numbers(lat, long, (lon_min, lon_min + self.width * cell_size,
+                                          lat_min, lat_min + self.height * cell_size), self.width, self.height)
+        self.order = np.argsort(cells, kind='stable')
+        self.starts = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=self.width * self.height))])
+        self.lat = lat[self.order]
+        self.long = long[self.order]
+
+    def _cell_range(self, low, high, origin, size):
+        first = int(np.clip(np.floor((low - origin) / self.cell_size), 0, size - 1))
+        last = int(np.clip(np.floor((high - origin) / self.cell_size), 0, size - 1))
+        return first, last
+
+    def query(self, lon_min=-np.inf, lon_max=np.inf, lat_min=-np.inf, lat_max=np.inf):
+        """Row numbers, in the order the points were given, of the points
+        with ``lon_min <= long <= lon_max`` and ``lat_min <= lat <= lat_max``."""
+        if lon_min > lon_max or lat_min > lat_max:
+            return np.zeros(0, dtype='int64')
+        i0, i1 = self._cell_range(lon_min, lon_max, self.bounds[0], self.width)
+        j0, j1 = self._cell_range(lat_min, lat_max, self.bounds[2], self.height)
+        rows = np.arange(j0, j1 + 1) * self.width
+        lo, hi = self.starts[rows + i0], self.starts[rows + i1 + 1]
+        lengths = hi - lo
+        # Concatenate the slices [lo, hi) without a Python loop.
+        positions = np.arange(lengths.sum()) + np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+        long, lat = self.long[positions], self.lat[positions]
+        inside = (long >= lon_min) & (long <= lon_max) & (lat >= lat_min) & (lat <= lat_max)
+        return np.sort(self.order[positions[inside]])
+
+
+@lru_cache(maxsize=None)
+def load_spatial_index(path=DATA_FILE, location='cardholder'):
+    lat, long = LOCATION_COLUMNS[location]
+    df = load_transactions(path)
+    return SpatialIndex(df[lat], df[long])
+
+
+@lru_cache(maxsize=None)
+def load_geo_grid(path=DATA_FILE, cell_size=GRID_CELL_SIZE, shape=GRID_SHAPE, location='cardholder'):
+    lat, long = LOCATION_COLUMNS[location]
+    df = load_transactions(path)
+    return GeoGrid(df[lat], df[long], df['amt'], df['is_fraud'], cell_size, shape)
+
+
+@lru_cache(maxsize=None)
+def load_geo_raster(path=DATA_FILE, location='cardholder'):
+    lat, long = LOCATION_COLUMNS[location]
+    df = load_transactions(path)
+    return GeoRaster(df[lat], df[long], df['amt'], df['is_fraud'])
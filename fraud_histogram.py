@@ -0,0 +1,59 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from fraud_aggregates import code_matrix
+
+NICE_STEPS = [1, 2, 5, 10]
+
+
+def nice_bin_size(span, nbins):
+    """Smallest 1/2/5 x 10^k bin size that covers ``span`` in at most
+    ``nbins`` bins, the kind of size plotly's auto-binning picks."""
+    rough = span / nbins if span > 0 else 1.0
+    base = 10.0 ** np.floor(np.log10(rough))
+    return base * next(step for step in NICE_STEPS if step * base >= rough * (1 - 1e-9))
+
+
+def bin_edges(values, nbins, start=None, end=None):
+    """Evenly spaced edges with a nice bin size, aligned to a multiple of it."""
+    values = np.asarray(values, dtype='float64')
+    low = np.nanmin(values) if start is None else start
+    high = np.nanmax(values) if end is None else end
+    size = nice_bin_size(high - low, nbins)
+    first = np.floor(low / size) * size
+    count = max(int(np.floor((high - first) / size)) + 1, 1)
+    return first + size * np.arange(count + 1)
+
+
+def binned_counts(values, edges, groups=None, n_groups=1):
+    """(n_groups, bins) counts of ``values`` in ``[edges[i], edges[i+1])``,
+    split by the small-int ``groups`` codes, in one ``np.bincount``. Values
+    outside the edges are dropped."""
+    values = np.asarray(values, dtype='float64')
+    groups = np.zeros(len(values), dtype='intp') if groups is None else np.asarray(groups, dtype='intp')
+    bins = np.searchsorted(edges, values, 'right') - 1
+    inside = (bins >= 0) & (bins < len(edges) - 1)
+    return code_matrix([groups[inside], bins[inside]], (n_groups, len(edges) - 1))
+
+
+def histogram_traces(counts, edges, names, colors, histnorm=None, **bar_kwargs):
+    """One ``go.Bar`` per row of ``counts``, positioned on the bin centers
+    with full bin width. ``histnorm`` is None (counts), 'probability' or
+    'probability density' as in ``go.Histogram``."""
+    widths = np.diff(edges)
+    centers = edges[:-1] + widths / 2
+    traces = []
+    for row, name, color in zip(counts, names, colors):
+        y = row.astype('float64')
+        if histnorm in ('probability', 'probability density') and row.sum():
+            y = y / row.sum()
+        if histnorm == 'probability density':
+            y = y / widths
+        traces.append(go.Bar(x=centers, y=y, width=widths, name=name, marker_color=color, **bar_kwargs))
+    return traces
+
+
+def figure_size(fig):
+    """Bytes of the figure JSON as sent to the browser."""
+    return len(pio.to_json(fig, validate=False))
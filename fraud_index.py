@@ -0,0 +1,284 @@
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from fraud_aggregates import iter_chunks, watch_drop_directory
+from fraud_data import DATA_FILE, load_transactions
+
+RANGE_MEASURES = ['count', 'frauds', 'amt_sum', 'amt_sumsq']
+CURVE_POINTS = 500
+
+
+def _to_time(value):
+    return np.datetime64(pd.Timestamp(value), 'us').astype('int64')
+
+
+def _sorted_quantile(values, n, q):
+    position = q * (n - 1)
+    lo = int(position)
+    hi = min(lo + 1, n - 1)
+    return values[lo] + (values[hi] - values[lo]) * (position - lo)
+
+
+class TimeIndex:
+    """Date-range statistics over time-sorted transactions.
+
+    Keeps the sorted timestamps plus, for every calendar day, prefix sums of
+    count, frauds, amount and amount squared split by month of year. A range
+    query is two binary searches and a difference of prefix rows; only the
+    rows of partially covered edge days are summed directly. Batches are
+    taken in with ``read_batch``/``merge``, which rebuild the prefix rows.
+    """
+
+    def __init__(self, transaction_date, is_fraud, amt):
+        times = np.asarray(transaction_date, dtype='datetime64[us]')
+        order = None
+        if len(times) > 1 and (np.diff(times.astype('int64')) < 0).any():
+            order = np.argsort(times, kind='stable')
+            times = times[order]
+        is_fraud = np.asarray(is_fraud, dtype='float64')
+        amt = np.asarray(amt, dtype='float64')
+        if order is not None:
+            is_fraud, amt = is_fraud[order], amt[order]
+        self.version = 0
+        self.lock = threading.Lock()
+        self._build(times.astype('int64'), is_fraud, amt)
+
+    def _build(self, times, is_fraud, amt):
+        self.times = times
+        self.is_fraud = is_fraud
+        self.amt = amt
+
+        days, day_starts = np.unique(times.astype('datetime64[us]').astype('datetime64[D]'), return_index=True)
+        self.day_bounds = np.append(day_starts, len(times))
+        self.day_months = pd.DatetimeIndex(days).month.to_numpy() - 1
+
+        per_day = {
+            'count': np.diff(self.day_bounds).astype('float64'),
+            'frauds': np.add.reduceat(is_fraud, day_starts) if len(times) else np.zeros(0),
+            'amt_sum': np.add.reduceat(amt, day_starts) if len(times) else np.zeros(0),
+            'amt_sumsq': np.add.reduceat(amt * amt, day_starts) if len(times) else np.zeros(0),
+        }
+        # prefix[k][d, m]: sum of measure k over days < d that fall in month m.
+        self.prefix = {}
+        for name, values in per_day.items():
+            by_month = np.zeros((len(days) + 1, 12))
+            by_month[np.arange(1, len(days) + 1), self.day_months] = values
+            self.prefix[name] = np.cumsum(by_month, axis=0)
+
+    def read_batch(self, path):
+        """Index the CSV batch ``path`` on its own, leaving this index untouched."""
+        chunks = list(iter_chunks(path, usecols=['trans_date_trans_time', 'amt', 'is_fraud']))
+        batch = pd.concat(chunks) if chunks else pd.DataFrame(columns=['transaction_date', 'is_fraud', 'amt'])
+        return TimeIndex(batch['transaction_date'], batch['is_fraud'], batch['amt'])
+
+    def merge(self, batch):
+        """Insert the rows of another TimeIndex in time order, under one lock
+        and one version."""
+        with self.lock:
+            # Equal timestamps keep existing rows first, like a stable sort
+            # of the concatenation.
+            at = np.searchsorted(self.times, batch.times, 'right')
+            self._build(np.insert(self.times, at, batch.times), np.insert(self.is_fraud, at, batch.is_fraud),
+                        np.insert(self.amt, at, batch.amt))
+            self.version += 1
+        return self
+
+    @property
+    def start(self):
+        return pd.Timestamp(self.times[0], unit='us')
+
+    @property
+    def end(self):
+        return pd.Timestamp(self.times[-1], unit='us')
+
+    def _rows(self, lo, hi):
+        amt = self.amt[lo:hi]
+        return np.array([hi - lo, self.is_fraud[lo:hi].sum(), amt.sum(), (amt * amt).sum()])
+
+    def monthly_sums(self, start=None, end=None):
+        """Return a (4, 12) array of count, frauds, amt_sum and amt_sumsq per
+        month of year for transactions with ``start <= time <= end``."""
+        with self.lock:
+            return self._monthly_sums(start, end)
+
+    def _monthly_sums(self, start, end):
+        lo = 0 if start is None else np.searchsorted(self.times, _to_time(start), 'left')
+        hi = len(self.times) if end is None else np.searchsorted(self.times, _to_time(end), 'right')
+        sums = np.zeros((len(RANGE_MEASURES), 12))
+        if hi <= lo:
+            return sums
+        first = np.searchsorted(self.day_bounds, lo, 'left')
+        last = np.searchsorted(self.day_bounds, hi, 'right') - 1
+        if first > last:
+            # The whole range lies inside a single day.
+            sums[:, self.day_months[last]] = self._rows(lo, hi)
+            return sums
+        for i, name in enumerate(RANGE_MEASURES):
+            sums[i] = self.prefix[name][last] - self.prefix[name][first]
+        if lo < self.day_bounds[first]:
+            sums[:, self.day_months[first - 1]] += self._rows(lo, self.day_bounds[first])
+        if self.day_bounds[last] < hi:
+            sums[:, self.day_months[last]] += self._rows(self.day_bounds[last], hi)
+        return sums
+
+    def rollup(self, start=None, end=None):
+        """Range sums per month of year, one row per month with transactions,
+        in the same shape as ``FraudCube.rollup('month')``."""
+        sums = self.monthly_sums(start, end)
+        present = np.flatnonzero(sums[0])
+        table = pd.DataFrame(dict(zip(RANGE_MEASURES, sums[:, present])),
+                             index=pd.Index(present + 1, name='month'))
+        return table.astype({'count': 'int64', 'frauds': 'int64'})
+
+
+class AmountIndex:
+    """Per-state transactions sorted by amount, with running sums.
+
+    Rows are ordered by (state, amt) and every measure keeps a cumulative
+    sum over that order, so the per-state totals of any amount range take
+    two binary searches per state and a difference of two prefix entries.
+    """
+
+    def __init__(self, state, amt, is_fraud, lat, long):
+        codes = state.array.codes
+        self.states = state.cat.categories
+        amt = np.asarray(amt, dtype='float64')
+        order = np.lexsort((amt, codes))
+        self.amt = amt[order]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.states))
+        self.bounds = np.concatenate([[0], np.cumsum(counts)]) + (codes < 0).sum()
+        self.prefix = {
+            name: np.concatenate([[0], np.cumsum(np.asarray(values, dtype='float64')[order])])
+            for name, values in (('is_fraud', is_fraud), ('amt', amt), ('lat', lat), ('long', long))
+        }
+
+    def range_sums(self, low=-np.inf, high=np.inf):
+        """Count and sums of is_fraud, amt, lat and long per state over rows
+        with ``low <= amt <= high``, for states with at least one such row."""
+        lo = np.empty(len(self.states), dtype='int64')
+        hi = np.empty(len(self.states), dtype='int64')
+        for i in range(len(self.states)):
+            start, end = self.bounds[i], self.bounds[i + 1]
+            lo[i] = start + np.searchsorted(self.amt[start:end], low, 'left')
+            hi[i] = start + np.searchsorted(self.amt[start:end], high, 'right')
+        sums = {'count': hi - lo}
+        for name, prefix in self.prefix.items():
+            sums[name] = prefix[hi] - prefix[lo]
+        table = pd.DataFrame(sums, index=pd.Index(self.states, name='state'))
+        return table[table['count'] > 0]
+
+
+class ThresholdIndex:
+    """Fraud and non-fraud amounts, each sorted with running sums.
+
+    Alerting on ``amt > threshold`` among rows with ``amt <= xlim`` is then a
+    couple of binary searches per class for any threshold, and the whole
+    precision/recall/alert-volume curve is one vectorized searchsorted.
+    """
+
+    def __init__(self, amt, is_fraud):
+        amt = np.asarray(amt, dtype='float64')
+        is_fraud = np.asarray(is_fraud) == 1
+        self.fraud = np.sort(amt[is_fraud])
+        self.non_fraud = np.sort(amt[~is_fraud])
+        self.prefix = {
+            'fraud': np.concatenate([[0], np.cumsum(self.fraud)]),
+            'non_fraud': np.concatenate([[0], np.cumsum(self.non_fraud)]),
+        }
+
+    def amount_stats(self, xlim=np.inf):
+        """Count, mean and median amount per class over ``amt <= xlim``."""
+        stats = {}
+        for name, values in (('fraud', self.fraud), ('non_fraud', self.non_fraud)):
+            n = np.searchsorted(values, xlim, 'right')
+            stats[name] = {
+                'count': int(n),
+                'mean': self.prefix[name][n] / n if n else np.nan,
+                'median': (values[(n - 1) // 2] + values[n // 2]) / 2 if n else np.nan,
+            }
+        return stats
+
+    def _curve(self, thresholds, xlim):
+        thresholds = np.asarray(thresholds, dtype='float64')
+        fraud_end = np.searchsorted(self.fraud, xlim, 'right')
+        non_fraud_end = np.searchsorted(self.non_fraud, xlim, 'right')
+        fraud_above = np.maximum(fraud_end - np.searchsorted(self.fraud, thresholds, 'right'), 0)
+        non_fraud_above = np.maximum(non_fraud_end - np.searchsorted(self.non_fraud, thresholds, 'right'), 0)
+        alerts = fraud_above + non_fraud_above
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {
+                'threshold': thresholds,
+                'alerts': alerts,
+                'fraud_above': fraud_above,
+                'non_fraud_above': non_fraud_above,
+                'precision': np.where(alerts > 0, fraud_above / alerts * 100, np.nan),
+                'recall': fraud_above / np.float64(fraud_end) * 100,
+                'alert_rate': alerts / np.float64(fraud_end + non_fraud_end) * 100,
+            }
+
+    def curve(self, thresholds, xlim=np.inf):
+        """Alerts (``amt > threshold``), fraud and non-fraud alerts, precision,
+        recall and alert rate (percent) per threshold over ``amt <= xlim``.
+        Precision is NaN where nothing is alerted."""
+        return pd.DataFrame(self._curve(thresholds, xlim))
+
+    def threshold_stats(self, threshold, xlim=np.inf):
+        """One point of ``curve``, as a dict."""
+        return {name: values[0] for name, values in self._curve([threshold], xlim).items()}
+
+    def box_stats(self, xlim=np.inf, max_outliers=1000):
+        """Box-plot statistics per class over ``amt <= xlim``: quartiles
+        (linear interpolation), whisker ends at the furthest amounts within
+        1.5 IQR, and the amounts beyond them, thinned to ``max_outliers``
+        evenly spaced ranks (always keeping the extremes)."""
+        stats = {}
+        for name, values in (('fraud', self.fraud), ('non_fraud', self.non_fraud)):
+            n = np.searchsorted(values, xlim, 'right')
+            if not n:
+                continue
+            q1, median, q3 = (_sorted_quantile(values, n, q) for q in (0.25, 0.5, 0.75))
+            low = np.searchsorted(values[:n], q1 - 1.5 * (q3 - q1), 'left')
+            high = np.searchsorted(values[:n], q3 + 1.5 * (q3 - q1), 'right')
+            outliers = np.concatenate([values[:low], values[high:n]])
+            if len(outliers) > max_outliers:
+                outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype('int64')]
+            stats[name] = {
+                'q1': q1, 'median': median, 'q3': q3,
+                'lowerfence': values[low], 'upperfence': values[high - 1],
+                'outliers': outliers,
+            }
+        return stats
+
+    def thresholds(self, xlim=np.inf, points=CURVE_POINTS):
+        """At most ``points`` thresholds up to ``xlim``: amounts at evenly
+        spaced ranks (quantiles) of each class, so the curve is sampled
+        where recall or precision moves and its size does not grow with
+        the data."""
+        grids = []
+        for values in (self.fraud, self.non_fraud):
+            n = np.searchsorted(values, xlim, 'right')
+            if n:
+                grids.append(values[np.linspace(0, n - 1, min(n, points // 2)).round().astype('int64')])
+        return np.unique(np.concatenate(grids)) if grids else np.zeros(0)
+
+
+@lru_cache(maxsize=None)
+def load_amount_index(path=DATA_FILE):
+    df = load_transactions(path)
+    return AmountIndex(df['state'], df['amt'], df['is_fraud'], df['lat'], df['long'])
+
+
+@lru_cache(maxsize=None)
+def load_time_index(path=DATA_FILE):
+    """Time index of ``path``, fed the batches dropped in ``FRAUD_DROP_DIR``."""
+    df = load_transactions(path)
+    return watch_drop_directory(TimeIndex(df['transaction_date'], df['is_fraud'], df['amt']))
+
+
+@lru_cache(maxsize=None)
+def load_threshold_index(path=DATA_FILE):
+    df = load_transactions(path)
+    return ThresholdIndex(df['amt'], df['is_fraud'])
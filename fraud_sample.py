@@ -0,0 +1,68 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from fraud_data import DATA_FILE, load_transactions
+
+SAMPLE_SEED = 0
+
+
+def _ranks(keys, order):
+    # Rank of every row among the rows with the same small-int key, visiting
+    # rows in ``order``. Keys fit in 16 bits, where the stable argsort is a
+    # radix sort.
+    keys = np.asarray(keys, dtype='int16')
+    visit = order[np.argsort(keys[order], kind='stable')]
+    starts = np.concatenate([[0], np.cumsum(np.bincount(keys))[:-1]])
+    ranks = np.empty(len(keys), dtype='int64')
+    ranks[visit] = np.arange(len(keys)) - starts[keys[visit]]
+    return ranks
+
+
+def stratified_permutation(is_fraud, strata=None, seed=SAMPLE_SEED):
+    """Seeded row order in which every prefix is a stratified sample.
+
+    Within each class (fraud / legitimate) the first row of every stratum
+    (e.g. state) comes first, then the rows of each stratum are spread
+    evenly; the two classes are then interleaved in proportion. Any prefix
+    of ``k`` rows therefore keeps the fraud ratio to within one row and
+    covers every stratum once ``k`` exceeds about twice their number. The
+    order only depends on the inputs and ``seed``.
+    """
+    rng = np.random.default_rng(seed)
+    is_fraud = (np.asarray(is_fraud) == 1).astype('int64')
+    n = len(is_fraud)
+    if strata is None:
+        strata = np.zeros(n, dtype='int64')
+    else:
+        strata = pd.factorize(np.asarray(strata), use_na_sentinel=False)[0]
+    group = is_fraud * (strata.max(initial=0) + 1) + strata
+    if group.max(initial=0) >= 2 ** 15:
+        raise ValueError('too many strata')
+    rank_in_group = _ranks(group, rng.permutation(n))
+    group_size = np.bincount(group)[group]
+    class_key = np.where(rank_in_group == 0, -1.0, rank_in_group / group_size) + rng.random(n) / group_size
+
+    # Rows of each class in class_key order, then merged so that the row of
+    # rank r in a class of size m sits at (r + u) / m of the way through.
+    by_class = [np.flatnonzero(is_fraud == label) for label in (0, 1)]
+    by_class = [rows[np.argsort(class_key[rows], kind='stable')] for rows in by_class]
+    merge_keys = [(np.arange(len(rows)) + rng.random(len(rows))) / max(len(rows), 1) for rows in by_class]
+    order = np.empty(n, dtype='int64')
+    order[np.arange(len(by_class[0])) + np.searchsorted(merge_keys[1], merge_keys[0])] = by_class[0]
+    order[np.arange(len(by_class[1])) + np.searchsorted(merge_keys[0], merge_keys[1], 'right')] = by_class[1]
+    return order
+
+
+def stratified_sample(df, n, seed=SAMPLE_SEED, strata='state'):
+    """Reproducible, fraud- and ``strata``-stratified stand-in for
+    ``df.sample(n)``."""
+    order = stratified_permutation(df['is_fraud'], None if strata is None else df[strata], seed)
+    return df.iloc[order[:n]]
+
+
+@lru_cache(maxsize=None)
+def load_sample_order(path=DATA_FILE, seed=SAMPLE_SEED):
+    df = load_transactions(path)
+    return stratified_permutation(df['is_fraud'], df['state'], seed)
@@ -0,0 +1,110 @@
+"""Serve a dashboard immediately while it loads in the background.
+
+    python fraud_server.py app_monthly_dashboard
+
+or, under any WSGI server, ``fraud_server:create_app('app_monthly_dashboard')``.
+
+The WSGI app answers as soon as the process starts. ``/healthz`` is the
+liveness probe and always returns 200. ``/readyz`` returns 503 until the
+dashboard module (and with it the dataset and its aggregates) has been
+imported by a background thread. Any other request waits for readiness, up
+to ``FRAUD_READY_TIMEOUT`` seconds, and is then handed to the dashboard.
+"""
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+HEALTH_PATH = '/healthz'
+READY_PATH = '/readyz'
+READY_TIMEOUT = float(os.environ.get('FRAUD_READY_TIMEOUT', '60'))
+
+logger = logging.getLogger(__name__)
+
+
+class LazyDashApp:
+    """WSGI app that imports ``module_name`` in a background thread and
+    dispatches to its ``app.server`` once the import has finished."""
+
+    def __init__(self, module_name, timeout=READY_TIMEOUT):
+        self.module_name = module_name
+        self.timeout = timeout
+        self.started = time.monotonic()
+        self.ready = threading.Event()
+        self.server = None
+        self.error = None
+        self.time_to_first_byte = None
+        self.time_to_ready = None
+        self.loader = threading.Thread(target=self._load, name='fraud-app-loader', daemon=True)
+        self.loader.start()
+
+    def _load(self):
+        try:
+            self.server = importlib.import_module(self.module_name).app.server
+        except Exception as e:
+            self.error = e
+            logger.exception('loading %s failed', self.module_name)
+        else:
+            self.time_to_ready = time.monotonic() - self.started
+            logger.info('%s ready after %.3fs', self.module_name, self.time_to_ready)
+        finally:
+            self.ready.set()
+
+    def status(self):
+        return {
+            'app': self.module_name,
+            'ready': self.ready.is_set() and self.error is None,
+            'error': None if self.error is None else repr(self.error),
+            'uptime': time.monotonic() - self.started,
+            'time_to_first_byte': self.time_to_first_byte,
+            'time_to_ready': self.time_to_ready,
+        }
+
+    def _json(self, start_response, status, body, headers=()):
+        payload = json.dumps(body).encode()
+        start_response(status, [('Content-Type', 'application/json'),
+                                ('Content-Length', str(len(payload)))] + list(headers))
+        return [payload]
+
+    def _start_response(self, start_response):
+        def wrapped(status, headers, exc_info=None):
+            if self.time_to_first_byte is None:
+                self.time_to_first_byte = time.monotonic() - self.started
+                logger.info('%s first byte after %.3fs', self.module_name, self.time_to_first_byte)
+            return start_response(status, headers, exc_info)
+        return wrapped
+
+    def __call__(self, environ, start_response):
+        start_response = self._start_response(start_response)
+        path = environ.get('PATH_INFO', '')
+        if path == HEALTH_PATH:
+            return self._json(start_response, '200 OK', {'status': 'ok'})
+        if path == READY_PATH:
+            status = self.status()
+            code = '200 OK' if status['ready'] else '503 Service Unavailable'
+            return self._json(start_response, code, status)
+        if not self.ready.wait(self.timeout) or self.error is not None:
+            return self._json(start_response, '503 Service Unavailable', self.status(),
+                              [('Retry-After', '5')])
+        return self.server(environ, start_response)
+
+
+def create_app(module_name, timeout=READY_TIMEOUT):
+    return LazyDashApp(module_name, timeout)
+
+
+def main():
+    from werkzeug.serving import run_simple
+
+    if len(sys.argv) != 2:
+        sys.exit('usage: python fraud_server.py APP_MODULE')
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    app = create_app(sys.argv[1].removesuffix('.py'))
+    run_simple(os.environ.get('HOST', '0.0.0.0'), int(os.environ.get('PORT', 8050)), app, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fraud_aggregates import FraudAggregates, add_time_columns
+from fraud_cube import FraudCube
+from fraud_data import DATA_FILE
+
+
+@pytest.fixture
+def batch_path(tmp_path):
+    # A 100-row drop batch with five blank states.
+    raw = pd.read_csv(DATA_FILE, nrows=100)
+    raw.loc[raw.index[::20], 'state'] = np.nan
+    path = tmp_path / 'batch.csv'
+    raw.to_csv(path, index=False)
+    return str(path)
+
+
+def test_missing_labels_are_left_out(batch_path):
+    raw = pd.read_csv(batch_path)
+    cube = FraudCube()
+    cube.merge(cube.read_batch(batch_path))
+    expected = raw['state'].value_counts().sort_index()
+    counts = cube.stats('state')['transactions']
+    assert counts.to_dict() == expected.to_dict()
+    assert cube.rows == expected.sum() == 95
+
+
+def test_matches_aggregates_on_missing_labels(batch_path):
+    cube = FraudCube()
+    cube.merge(cube.read_batch(batch_path))
+    aggregates = FraudAggregates()
+    aggregates.merge(aggregates.read_batch(batch_path))
+    by_state = aggregates.table('state')
+    pd.testing.assert_series_equal(cube.stats('state')['transactions'], by_state['transactions'],
+                                   check_index_type=False, check_dtype=False)
+
+
+def test_update_drops_rows_with_missing_codes():
+    df = add_time_columns(pd.read_csv(DATA_FILE, nrows=100))
+    df = df.assign(category=df['category'].where(df.index % 10 != 0))
+    cube = FraudCube().update(df)
+    assert cube.rows == 90
+    assert cube.stats()['transactions'].iloc[0] == 90
+    assert cube.stats('category')['transactions'].to_dict() == df['category'].value_counts().to_dict()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from fraud_data import DATA_FILE
+from fraud_kde import AGREEMENT_TOLERANCE, binned_kde
+
+XLIM = 1500
+GRID = np.linspace(0, XLIM, 1000)
+
+
+def relative_error(data, bw_method):
+    exact = stats.gaussian_kde(data, bw_method)(GRID)
+    return np.abs(binned_kde(data, GRID, bw_method) - exact).max() / exact.max()
+
+
+@pytest.fixture(scope='module')
+def amounts():
+    amt = pd.read_csv(DATA_FILE, usecols=['amt', 'is_fraud'])
+    amt = amt[amt['amt'] <= XLIM]
+    return {label: group['amt'].to_numpy() for label, group in amt.groupby('is_fraud')}
+
+
+@pytest.mark.parametrize('bw_method', ['scott', 'silverman'])
+@pytest.mark.parametrize('label', [0, 1])
+def test_matches_gaussian_kde_on_dataset(amounts, label, bw_method):
+    assert relative_error(amounts[label], bw_method) < AGREEMENT_TOLERANCE
+
+
+@pytest.mark.parametrize('bw_method', ['scott', 'silverman', 0.3])
+def test_matches_gaussian_kde_near_grid_edges(bw_method):
+    # Mass close to 0 and past XLIM must be spread exactly as the exact KDE does.
+    rng = np.random.default_rng(0)
+    data = np.concatenate([rng.exponential(20, 5000), rng.normal(XLIM, 50, 500)])
+    assert relative_error(data, bw_method) < AGREEMENT_TOLERANCE
+
+
+def test_rejects_uneven_grid():
+    with pytest.raises(ValueError):
+        binned_kde([1.0, 2.0, 3.0], np.array([0.0, 1.0, 3.0]))